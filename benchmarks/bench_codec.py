@@ -0,0 +1,89 @@
+"""数据库读写的基准测试
+
+生成一个包含 N 个事项的数据库（固定随机种子，结果可重复），分别测量:
+
+- load: 读取并逐个检查事项 (trusted_db = false, 默认)
+- load (trusted): 读取但不检查事项 (trusted_db = true)
+- dump: 写入数据库
+
+如果安装了 orjson, 会同时测量 orjson 与标准库 json, 以便比较。
+
+Usage: python benchmarks/bench_codec.py [-n 100000] [-r 5]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from simpletodo import codec, util
+from simpletodo.model import DB, Repeat, TodoItem, TodoStatus
+
+
+def make_db(n: int, seed: int = 0) -> DB:
+    rng = random.Random(seed)
+    start = 1_600_000_000.0
+    items = []
+    for i in range(n):
+        ctime = start + i * 60 + rng.random()
+        status = rng.choice([TodoStatus.Incomplete, TodoStatus.Completed])
+        dtime = 0
+        if status is TodoStatus.Completed:
+            dtime = ctime + rng.randint(60, 30 * 86400)
+        items.append(
+            TodoItem(
+                ctime=ctime,
+                dtime=dtime,
+                event=f"todo item {i} " + "x" * rng.randint(10, 60),
+                status=status.name,
+                repeat=Repeat.Never.name,
+                s_date="",
+                n_date="",
+                mtime=ctime,
+            )
+        )
+    return DB(u_date="", items=items, hide_motto=False, select_motto=0, mottos=[])
+
+
+def best_of(repeat: int, func) -> float:
+    """返回 repeat 次中最快的一次的耗时 (ms)。"""
+    result = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        result.append(time.perf_counter() - start)
+    return min(result) * 1000
+
+
+def run(db: DB, path: Path, repeat: int) -> None:
+    codec.dump_file(db, path)
+    size = path.stat().st_size / 1024 / 1024
+    load = best_of(repeat, lambda: util.load_db_from(path))
+    trusted = best_of(repeat, lambda: util.load_db_from(path, trusted=True))
+    dump = best_of(repeat, lambda: codec.dump_file(db, path))
+    print(f"  file size:      {size:.1f} MB")
+    print(f"  load:           {load:.0f} ms")
+    print(f"  load (trusted): {trusted:.0f} ms")
+    print(f"  dump:           {dump:.0f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=100_000, help="number of items")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="best of N runs")
+    args = parser.parse_args()
+
+    db = make_db(args.n)
+    backends = ["orjson", "json"] if codec.orjson else ["json"]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp).joinpath("todo-db.json")
+        for name in backends:
+            if name == "json":
+                codec.orjson = None
+            print(f"{name} ({args.n} items, best of {args.repeat}):")
+            run(db, path, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
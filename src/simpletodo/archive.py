@@ -0,0 +1,128 @@
+"""已完成事项的压缩归档
+
+执行 'todo archive' 会把已完成的事项从数据库中移出，写入一个新的归档分段 (segment),
+此后每次修改数据库只需重写未归档的部分。
+
+归档分段保存在数据库旁边的文件夹中 (例如 todo-db.archive/), 写入后不再修改。
+分段的文件名由 dtime 的范围加上随机后缀组成，因此同步文件夹中两台电脑分别归档时
+不会产生同名文件；同一个事项可能出现在多个分段中，读取时需按 ctime 去重。
+每个分段文件的第一行是未压缩的 json 头部（事项数量、dtime 的范围、压缩方式），
+其后是压缩后的事项列表。'todo archive --list' 只需读取头部，不必解压。
+
+如果安装了 zstandard 则使用 zstd 压缩，否则使用标准库 gzip.
+"""
+
+import gzip
+import os
+import secrets
+from pathlib import Path
+from typing import Iterator, TypedDict
+
+import click
+
+from simpletodo import codec
+from simpletodo.model import TodoList
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 读取分段时可能出现的错误（文件损坏、格式错误、缺少 zstandard 等）
+ReadErrors: tuple[type[Exception], ...] = (ValueError, KeyError, EOFError, OSError)
+if zstandard:
+    ReadErrors += (zstandard.ZstdError,)
+
+Extensions = {"zstd": "zst", "gzip": "gz"}  # 分段文件的扩展名
+
+
+class SegmentHeader(TypedDict):
+    count: int  # 事项数量
+    min_dtime: float
+    max_dtime: float
+    compression: str  # "zstd" 或 "gzip"
+
+
+def archive_dir(db_path: str) -> Path:
+    return Path(db_path).with_suffix(".archive")
+
+
+def segment_paths(folder: Path) -> list[Path]:
+    if not folder.is_dir():
+        return []
+    return sorted(x for x in folder.glob("seg-*") if x.suffix != ".tmp")
+
+
+def compress(data: bytes) -> tuple[bytes, str]:
+    if zstandard:
+        return zstandard.ZstdCompressor().compress(data), "zstd"
+    return gzip.compress(data), "gzip"
+
+
+def decompress(data: bytes, compression: str) -> bytes:
+    match compression:
+        case "zstd":
+            if not zstandard:
+                raise ValueError(
+                    "this segment is compressed with zstd, "
+                    "please install zstandard (pip install simpletodo[archive])"
+                )
+            return zstandard.ZstdDecompressor().decompress(data)
+        case "gzip":
+            return gzip.decompress(data)
+        case _:
+            raise ValueError(f"Unknown compression: {compression}")
+
+
+def write_segment(folder: Path, items: TodoList) -> Path:
+    """把 items 写入一个新的分段，先写入临时文件再改名，以免留下不完整的分段。"""
+    folder.mkdir(parents=True, exist_ok=True)
+    body, compression = compress(codec.dumps(items, indent=False))
+    dtimes = [x["dtime"] for x in items]
+    header = SegmentHeader(
+        count=len(items),
+        min_dtime=min(dtimes),
+        max_dtime=max(dtimes),
+        compression=compression,
+    )
+    name = "seg-{:010d}-{:010d}-{}.json.{}".format(
+        int(header["min_dtime"]),
+        int(header["max_dtime"]),
+        secrets.token_hex(4),
+        Extensions[compression],
+    )
+    path = folder.joinpath(name)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(codec.dumps(header, indent=False) + b"\n" + body)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_header(path: Path) -> SegmentHeader:
+    try:
+        with open(path, "rb") as f:
+            return codec.loads(f.readline())
+    except ReadErrors as e:
+        raise click.ClickException(f"{path}: {e}")
+
+
+def read_segment(path: Path) -> TodoList:
+    """读取一个分段。文件损坏或缺少 zstandard 时 raise click.ClickException."""
+    try:
+        with open(path, "rb") as f:
+            header: SegmentHeader = codec.loads(f.readline())
+            return codec.loads(decompress(f.read(), header["compression"]))
+    except ReadErrors as e:
+        raise click.ClickException(f"{path}: {e}")
+
+
+def iter_items(folder: Path) -> Iterator[TodoList]:
+    """逐个分段读取已归档的事项。"""
+    for path in segment_paths(folder):
+        yield read_segment(path)
+
+
+def archived_ctimes(folder: Path) -> set[float]:
+    """全部已归档事项的 ctime (即 ID)。"""
+    return {x["ctime"] for items in iter_items(folder) for x in items}
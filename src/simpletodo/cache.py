@@ -0,0 +1,113 @@
+"""'todo' 与 'todo -a' 的输出缓存
+
+缓存的 key 由数据库文件的路径、大小、修改时间、inode 以及今天的日期组成，
+key 相同时直接输出缓存内容，不需要导入 arrow, click 以及 simpletodo.model 等模块。
+每次执行 update_db 都会清除缓存。
+"""
+
+import datetime
+import json
+import os
+import sys
+from pathlib import Path
+
+from simpletodo.paths import (
+    app_cache_dir,
+    list_all_cache_path,
+    list_cache_path,
+    todo_cfg_path,
+)
+
+
+# 设置该环境变量 (或使用 'todo --read-only') 可临时启用只读模式
+read_only_env = "TODO_READ_ONLY"
+
+
+def env_read_only() -> bool:
+    """TODO_READ_ONLY 为空、0、false 或 no 时不启用只读模式。"""
+    return os.getenv(read_only_env, "").lower() not in ("", "0", "false", "no")
+
+
+def cache_path(show_all: bool) -> Path:
+    return list_all_cache_path if show_all else list_cache_path
+
+
+def cache_key(db_path: str) -> bytes:
+    """数据库文件的指纹加上今天的日期（日期变化时周期计划可能需要刷新）。"""
+    st = os.stat(db_path)
+    today = datetime.date.today().isoformat()
+    key = f"{db_path}|{st.st_size}|{st.st_mtime_ns}|{st.st_ino}|{today}"
+    return key.encode()
+
+
+def read_list_cache(db_path: str, show_all: bool) -> bytes | None:
+    """key 相符时返回缓存的输出内容，否则返回 None."""
+    try:
+        with open(cache_path(show_all), "rb") as f:
+            data = f.read()
+        key = cache_key(db_path)
+    except OSError:
+        return None
+    header, _, output = data.partition(b"\n")
+    if header != key:
+        return None
+    return output
+
+
+def write_list_cache(key: bytes, show_all: bool, output: str) -> None:
+    """key 必须在读取数据库之前取得（见 cache_key），否则在读取与写入缓存之间
+    被其他进程修改的数据库会与旧的输出内容对应起来。
+
+    先写入临时文件再改名，以免其他进程读到不完整的缓存。
+    """
+    path = cache_path(show_all)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        app_cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(key + b"\n" + output.encode())
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def clear_list_cache() -> None:
+    for path in (list_cache_path, list_all_cache_path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def main() -> None:
+    """命令 'todo' 的入口。
+
+    如果只是显示列表 ('todo' 或 'todo -a') 并且缓存有效，则直接输出缓存；
+    如果是 'todo add -g' 并且常驻窗口正在运行，则只通知它显示出来。
+    否则才导入 simpletodo.main 执行完整的程序。
+    """
+    args = [x for x in sys.argv[1:] if x != "--read-only"]
+    read_only = len(args) < len(sys.argv) - 1 or env_read_only()
+    if args in (["add", "-g"], ["add", "--gui"]) and not read_only:
+        from simpletodo import resident
+
+        if resident.show_window():
+            return
+
+    if args in ([], ["-a"], ["--all"]):
+        try:
+            with open(todo_cfg_path, "rb") as f:
+                db_path = json.load(f)["db_path"]
+        except (OSError, ValueError, KeyError):
+            db_path = ""
+        output = read_list_cache(db_path, bool(args)) if db_path else None
+        if output is not None:
+            sys.stdout.buffer.write(output)
+            return
+
+    from simpletodo.main import cli
+
+    cli()
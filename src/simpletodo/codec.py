@@ -0,0 +1,37 @@
+"""JSON 编码/解码
+
+如果安装了 orjson (pip install orjson) 则使用 orjson, 否则使用标准库 json.
+orjson 在数据库较大时速度明显更快，但缩进只能是 2 个空格（不影响数据内容）。
+"""
+
+import json
+from pathlib import Path
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data: bytes) -> Any:
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = True) -> bytes:
+    """indent 为真时输出便于人类阅读的格式，否则输出紧凑格式。"""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=4 if indent else None, ensure_ascii=False).encode()
+
+
+def load_file(path: str | Path) -> Any:
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def dump_file(obj: Any, path: str | Path, indent: bool = True) -> None:
+    with open(path, "wb") as f:
+        f.write(dumps(obj, indent))
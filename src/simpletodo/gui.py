@@ -1,8 +1,15 @@
+import os
 import tkinter as tk
+from tkinter import messagebox
+from typing import Callable
+
+import click
 import pyperclip
 
+from simpletodo import resident
+from simpletodo.history import new_delta
 from simpletodo.model import DB, TodoConfig, new_todoitem
-from simpletodo.util import print_result, update_db
+from simpletodo.util import load_db, print_result, update_db
 
 
 def create_window_center(title: str) -> tk.Tk:
@@ -31,7 +38,9 @@ def get_text(form_input: tk.Entry | tk.Text) -> str:
         return ""
 
 
-def tk_add_todoitem(db: DB, cfg: TodoConfig) -> None:
+def create_add_form(
+    on_add: Callable[[str], None], on_cancel: Callable[[], None]
+) -> tuple[tk.Tk, tk.Text]:
     window = create_window_center("todo")
 
     label = tk.Label(text="todo", pady=5)
@@ -43,21 +52,35 @@ def tk_add_todoitem(db: DB, cfg: TodoConfig) -> None:
     form_input = tk.Text(master=frame, width=60, height=10, pady=5)
     form_input.pack()
 
-    def btn_click():
-        msg = get_text(form_input)
+    post_btn = tk.Button(
+        master=frame, text="Add", command=lambda: on_add(get_text(form_input))
+    )
+    post_btn.pack(side=tk.RIGHT, padx=5, pady=5, ipadx=5)
+
+    cancel_btn = tk.Button(master=frame, text="Cancel", command=on_cancel)
+    cancel_btn.pack(side=tk.RIGHT, padx=5, pady=5)
+
+    return window, form_input
+
+
+def tk_add_todoitem(db: DB, cfg: TodoConfig) -> None:
+    def add_item(msg: str):
         if not msg:
             print("No Content (未输入代办事项)")
         else:
-            db["items"].insert(0, new_todoitem(msg))
-            update_db(db, cfg)
+            item = new_todoitem(msg)
+            db["items"].insert(0, item)
+            try:
+                update_db(db, cfg, new_delta(added=[(0, item)]), f"add {msg}")
+            except (click.ClickException, OSError) as e:
+                # 保留窗口与已输入的内容，以便重试
+                db["items"].pop(0)
+                messagebox.showerror("todo", f"Failed to add the item:\n{e}")
+                return
             print_result(db)
         window.quit()
 
-    post_btn = tk.Button(master=frame, text="Add", command=btn_click)
-    post_btn.pack(side=tk.RIGHT, padx=5, pady=5, ipadx=5)
-
-    cancel_btn = tk.Button(master=frame, text="Cancel", command=window.quit)
-    cancel_btn.pack(side=tk.RIGHT, padx=5, pady=5)
+    window, form_input = create_add_form(add_item, lambda: window.quit())
 
     form_input.focus()
     try:
@@ -67,3 +90,72 @@ def tk_add_todoitem(db: DB, cfg: TodoConfig) -> None:
         pass
 
     window.mainloop()
+
+
+def db_fingerprint(cfg: TodoConfig) -> tuple[int, int, int]:
+    st = os.stat(cfg["db_path"])
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+def tk_resident_gui(cfg: TodoConfig) -> None:
+    """常驻后台的 GUI 窗口，平时隐藏，收到 'todo add -g' 的通知时显示。
+
+    数据库保持在内存中，只有当数据库文件被其他命令修改过时才重新读取。
+    """
+    db = load_db(cfg)
+    fingerprint: tuple[int, int, int] | None = db_fingerprint(cfg)
+
+    def add_item(msg: str):
+        nonlocal db, fingerprint
+        if not msg:
+            window.withdraw()
+            return
+        try:
+            # 例如同步工具正在改写数据库时可能读取失败
+            if db_fingerprint(cfg) != fingerprint:
+                db = load_db(cfg)
+            item = new_todoitem(msg)
+            db["items"].insert(0, item)
+            update_db(db, cfg, new_delta(added=[(0, item)]), f"add {msg}")
+            fingerprint = db_fingerprint(cfg)
+        except (click.ClickException, OSError) as e:
+            # 窗口保持显示，已输入的内容不会丢失，下次重新读取数据库
+            fingerprint = None
+            messagebox.showerror("todo", f"Failed to add the item:\n{e}", parent=window)
+            return
+        window.withdraw()
+
+    def show():
+        form_input.delete("1.0", tk.END)
+        try:
+            form_input.insert(tk.END, window.clipboard_get())
+        except tk.TclError:
+            pass
+        window.deiconify()
+        window.lift()
+        window.focus_force()
+        form_input.focus()
+
+    def on_message(*_):
+        if resident.receive(server) == resident.ShowMsg:
+            show()
+
+    def poll():
+        on_message()
+        window.after(50, poll)
+
+    window, form_input = create_add_form(add_item, lambda: window.withdraw())
+    window.protocol("WM_DELETE_WINDOW", window.withdraw)
+    window.withdraw()
+
+    server = resident.listen()
+    try:
+        # Windows 不支持 createfilehandler, 只能定时检查
+        window.tk.createfilehandler(server.sock, tk.READABLE, on_message)
+    except AttributeError:
+        window.after(50, poll)
+
+    try:
+        window.mainloop()
+    finally:
+        resident.stop(server)
@@ -0,0 +1,222 @@
+"""撤销/重做 (undo/redo) 历史记录
+
+每次修改数据库时，由命令直接提供本次修改的内容 (delta), 而不是保存整个数据库的副本。
+历史记录保存在一个 json 文件中，总体积超过上限时自动丢弃最旧的记录。
+"""
+
+from pathlib import Path
+from typing import Any, TypedDict
+
+from simpletodo import codec
+from simpletodo.model import DB, ErrMsg, TodoItem
+
+# 数据库中除了 items 以外的字段
+DBFields = [k for k in DB.__annotations__ if k != "items"]
+
+
+class Delta(TypedDict):
+    removed: list[tuple[int, TodoItem]]  # (修改前的 index, item)
+    added: list[tuple[int, TodoItem]]  # (修改后的 index, item)
+    changed: list[tuple[int, int, float, dict[str, list]]]  # (旧index, 新index, ctime, {字段: [旧值, 新值]})
+    fields: dict[str, list]  # {字段: [旧值, 新值]}
+
+
+class HistoryEntry(TypedDict):
+    cmd: str  # 产生该修改的命令，例如 "done 3"
+    delta: Delta
+
+
+class History(TypedDict):
+    db_path: str  # 历史记录只对应一个数据库，更改数据库位置后历史记录作废
+    undo: list[HistoryEntry]
+    redo: list[HistoryEntry]
+
+
+def new_history(db_path: str) -> History:
+    return History(db_path=db_path, undo=[], redo=[])
+
+
+def new_delta(
+    removed: list | None = None,
+    added: list | None = None,
+    changed: list | None = None,
+    fields: dict | None = None,
+) -> Delta:
+    return Delta(
+        removed=removed or [],
+        added=added or [],
+        changed=changed or [],
+        fields=fields or {},
+    )
+
+
+def item_change(idx: int, before: TodoItem, after: TodoItem) -> tuple:
+    """同一位置的事项修改前后的差异，用于 Delta 的 changed 字段。"""
+    diff = {k: [before.get(k), v] for k, v in after.items() if before.get(k) != v}
+    return idx, idx, before["ctime"], diff
+
+
+def snapshot_fields(db: DB) -> dict[str, Any]:
+    """复制数据库中除 items 以外的字段（体积很小），用于 fields_delta."""
+    return {k: list(db[k]) if isinstance(db[k], list) else db[k] for k in DBFields}
+
+
+def fields_delta(before: dict[str, Any], db: DB) -> Delta:
+    fields = {k: [before[k], db[k]] for k in DBFields if before[k] != db[k]}
+    return new_delta(fields=fields)
+
+
+def make_delta(old: DB, new: DB) -> Delta:
+    """比较修改前后的两个数据库，以 ctime 作为事项的 ID (用于无法直接得出 delta 的情况，比如 merge)。"""
+    old_idx = {x["ctime"]: i for i, x in enumerate(old["items"])}
+    new_idx = {x["ctime"]: i for i, x in enumerate(new["items"])}
+
+    removed = [(i, x) for i, x in enumerate(old["items"]) if x["ctime"] not in new_idx]
+    added = [(i, x) for i, x in enumerate(new["items"]) if x["ctime"] not in old_idx]
+    changed = []
+    for i, item in enumerate(new["items"]):
+        j = old_idx.get(item["ctime"])
+        if j is None:
+            continue
+        old_item = old["items"][j]
+        if old_item == item:
+            continue
+        diff = {
+            k: [old_item.get(k), v] for k, v in item.items() if old_item.get(k) != v
+        }
+        changed.append((j, i, item["ctime"], diff))
+
+    fields = {k: [old[k], new[k]] for k in DBFields if old[k] != new[k]}
+    return Delta(removed=removed, added=added, changed=changed, fields=fields)
+
+
+def is_empty(delta: Delta) -> bool:
+    return not (
+        delta["removed"] or delta["added"] or delta["changed"] or delta["fields"]
+    )
+
+
+def invert_delta(delta: Delta) -> Delta:
+    return Delta(
+        removed=delta["added"],
+        added=delta["removed"],
+        changed=[
+            (i, j, ctime, {k: [v[1], v[0]] for k, v in diff.items()})
+            for j, i, ctime, diff in delta["changed"]
+        ],
+        fields={k: [v[1], v[0]] for k, v in delta["fields"].items()},
+    )
+
+
+def find_item(items: list[TodoItem], idx: int, ctime: float) -> int:
+    """通常 idx 就是正确的位置，只有当数据库被其他途径修改过时才需要查找。"""
+    if 0 <= idx < len(items) and items[idx]["ctime"] == ctime:
+        return idx
+    for i, item in enumerate(items):
+        if item["ctime"] == ctime:
+            return i
+    return -1
+
+
+def apply_delta(db: DB, delta: Delta) -> int:
+    """把 delta 应用到修改前的数据库，耗时与修改的规模成正比。
+
+    返回找不到的事项的数量（例如已被归档或被其他途径删除），
+    大于零时说明数据库已不是该 delta 的修改前状态，此时不应保存 db.
+    """
+    missing = 0
+    items = db["items"]
+    for idx, item in sorted(delta["removed"], key=lambda x: x[0], reverse=True):
+        i = find_item(items, idx, item["ctime"])
+        if i < 0:
+            missing += 1
+            continue
+        del items[i]
+    for idx, item in sorted(delta["added"], key=lambda x: x[0]):
+        items.insert(min(idx, len(items)), item)
+    for _, idx, ctime, diff in delta["changed"]:
+        if "ctime" in diff:
+            # 例如 'todo redo' 会修改 ctime, 此时应按修改前的 ctime 查找
+            ctime = diff["ctime"][0]
+        i = find_item(items, idx, ctime)
+        if i < 0:
+            missing += 1
+            continue
+        for k, v in diff.items():
+            items[i][k] = v[1]
+    for k, v in delta["fields"].items():
+        db[k] = v[1]
+    return missing
+
+
+def check_entry(entry: Any) -> ErrMsg:
+    if not isinstance(entry, dict) or not isinstance(entry.get("cmd"), str):
+        return "an entry should be an object with 'cmd'"
+    delta = entry.get("delta")
+    if not isinstance(delta, dict):
+        return f"entry '{entry['cmd']}': 'delta' should be an object"
+    for k in ("removed", "added", "changed"):
+        if not isinstance(delta.get(k), list):
+            return f"entry '{entry['cmd']}': '{k}' should be a list"
+    if not isinstance(delta.get("fields"), dict):
+        return f"entry '{entry['cmd']}': 'fields' should be an object"
+    return ""
+
+
+def check_history(hist: Any) -> ErrMsg:
+    """检查历史记录的格式（只检查结构，不检查 delta 中的每个事项）。"""
+    if not isinstance(hist, dict):
+        return "the history should be an object"
+    for key in ("undo", "redo"):
+        if not isinstance(hist.get(key), list):
+            return f"'{key}' should be a list"
+        for entry in hist[key]:
+            if err := check_entry(entry):
+                return err
+    return ""
+
+
+def load_history(history_path: Path, db_path: str) -> History:
+    """读取历史记录，格式错误时 raise ValueError."""
+    if not history_path.exists():
+        return new_history(db_path)
+    hist: History = codec.load_file(history_path)
+    if isinstance(hist, dict) and hist.get("db_path") != db_path:
+        return new_history(db_path)
+    if err := check_history(hist):
+        raise ValueError(err)
+    return hist
+
+
+def write_history(hist: History, history_path: Path) -> None:
+    codec.dump_file(hist, history_path, indent=False)
+
+
+def entry_size(entry: Any) -> int:
+    return len(codec.dumps(entry, indent=False))
+
+
+def fits(delta: Delta, max_size: int) -> bool:
+    """单独一条记录是否能放进历史记录中。"""
+    return entry_size(delta) <= max_size
+
+
+def push_entry(hist: History, entry: HistoryEntry, max_size: int) -> bool:
+    """添加一条新的修改记录，并清空 redo 记录。
+
+    历史记录的总体积超过 max_size 时，从最旧的记录开始丢弃。
+    单独一条超过上限的记录（比如一次删除大量事项）不会被保存，
+    此时保留原有的记录并返回 False.
+    """
+    hist["redo"] = []
+    if not fits(entry["delta"], max_size):
+        return False
+    hist["undo"].append(entry)
+    sizes = [entry_size(x) for x in hist["undo"]]
+    total = sum(sizes)
+    drop = 0
+    while drop < len(sizes) and total > max_size:
+        total -= sizes[drop]
+        drop += 1
+    del hist["undo"][:drop]
+    return True
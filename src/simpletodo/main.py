@@ -1,12 +1,20 @@
+import io
+import os
 import random
+from contextlib import redirect_stdout
 from pathlib import Path
 
 import arrow
 import click
 import pyperclip
-from simpletodo.gui import tk_add_todoitem
+from simpletodo.gui import tk_add_todoitem, tk_resident_gui
+from simpletodo.merge import merge_dbs
+from simpletodo.stats import print_stats
+from simpletodo.watch import Watcher
+from simpletodo import archive, cache, history, query, resident
 
 from simpletodo.model import (
+    DB,
     ErrMsg,
     Repeat,
     TodoStatus,
@@ -29,23 +37,65 @@ def check(ctx: click.Context, err: ErrMsg) -> None:
         ctx.exit()
 
 
+def current_db_path() -> str:
+    """'-w' 与 '-d' 在初始化之前执行，此时配置文件可能还不存在。"""
+    if util.todo_cfg_path.exists():
+        return util.load_cfg()["db_path"]
+    return util.default_db_path.__str__()
+
+
 def show_where(ctx: click.Context, _, value):
     if not value or ctx.resilient_parsing:
         return
     click.echo(f"[todo] {__file__}")
     click.echo(f"[config] {util.todo_cfg_path}")
-    click.echo(f"[database] {db_path}")
+    click.echo(f"[database] {current_db_path()}")
     ctx.exit()
 
 
 def dump(ctx: click.Context, _, value):
     if not value or ctx.resilient_parsing:
         return
+    db_path = current_db_path()
+    if not Path(db_path).exists():
+        check(ctx, f"{db_path} does not exist.")
     with open(db_path, "rb") as f:
         click.echo(f.read())
     ctx.exit()
 
 
+def print_listing(db: DB, show_all: bool) -> None:
+    """显示格言及待办事项列表 ('todo' 与 'todo -a' 的输出)"""
+
+    # 显示格言
+    if (not db["hide_motto"]) and db["mottos"]:
+        n = db["select_motto"]
+        if n:
+            # 固定显示
+            click.echo(f"\n【{db['mottos'][n-1]}】")
+        else:
+            # 随机显示（并且随机不显示）
+            # 五分之一的概率会显示
+            if random.randint(1, 5) == 1:
+                click.echo(f"\n【{random.choice(db['mottos'])}】")
+
+    # 显示 todo
+    if not db["items"]:
+        click.echo("There's no todo item.")
+        click.echo("Use 'todo add ...' to add a todo item.")
+        click.echo("Use 'todo --help' to get more information.")
+        return
+
+    todo_list, done_list, repeat_list = util.split_lists(db)
+    util.print_todolist(todo_list, show_all)
+
+    if show_all:
+        util.print_donelist(done_list)
+        util.print_repeatlist(repeat_list)
+
+    print()
+
+
 @click.group(invoke_without_command=True)
 @click.help_option("-h", "--help")
 @click.version_option(
@@ -81,14 +131,28 @@ def dump(ctx: click.Context, _, value):
 @click.option(
     "new_path", "--set-db-path", type=click.Path(), help="Change the database location."
 )
+@click.option(
+    "read_only",
+    "--read-only",
+    is_flag=True,
+    help="Never write to any file (also: env TODO_READ_ONLY=1).",
+)
 @click.pass_context
-def cli(ctx, show_all, new_path):
+def cli(ctx, show_all, new_path, read_only):
     """simple-todo: Yet another command line TODO tool (命令行TODO工具)
 
     Just run 'todo' (with no options and no command) to list all items.
 
     https://pypi.org/project/simpletodo/
     """
+    if read_only:
+        # 子命令各自读取配置，因此通过环境变量传递只读模式
+        os.environ[util.read_only_env] = "1"
+
+    # 初始化 (必须在处理 --read-only 之后，否则只读模式下仍可能写入文件)
+    util.ensure_db_file()
+    util.upgrade_to_v016()
+
     if ctx.invoked_subcommand is None:
         cfg = util.load_cfg()
         if new_path:
@@ -96,36 +160,23 @@ def cli(ctx, show_all, new_path):
             check(ctx, err)
             ctx.exit()
 
+        # 缓存的 key 必须与本次读取的数据库对应，因此在读取之前取得，
+        # 只有本进程刷新周期计划写入了数据库时才重新取得
+        key = cache.cache_key(cfg["db_path"])
         db = util.load_db(cfg)
+        if util.update_schedules(db, cfg):
+            key = cache.cache_key(cfg["db_path"])
 
-        # 显示格言
-        if (not db["hide_motto"]) and db["mottos"]:
-            n = db["select_motto"]
-            if n:
-                # 固定显示
-                click.echo(f"\n【{db['mottos'][n-1]}】")
-            else:
-                # 随机显示（并且随机不显示）
-                # 五分之一的概率会显示
-                if random.randint(1, 5) == 1:
-                    click.echo(f"\n【{random.choice(db['mottos'])}】")
-
-        # 显示 todo
-        util.update_schedules(db, cfg)
-        if not db["items"]:
-            click.echo("There's no todo item.")
-            click.echo("Use 'todo add ...' to add a todo item.")
-            click.echo("Use 'todo --help' to get more information.")
-            ctx.exit()
+        # 捕获输出，以便写入缓存（随机显示格言时不可缓存）
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            print_listing(db, show_all)
+        output = buf.getvalue()
+        click.echo(output, nl=False)
 
-        todo_list, done_list, repeat_list = util.split_lists(db)
-        util.print_todolist(todo_list, show_all)
-
-        if show_all:
-            util.print_donelist(done_list)
-            util.print_repeatlist(repeat_list)
-
-        print()
+        cacheable = db["hide_motto"] or not db["mottos"] or db["select_motto"]
+        if cacheable and not cfg["read_only"]:
+            cache.write_list_cache(key, show_all, output)
 
 
 # 以上是主命令
@@ -150,7 +201,10 @@ def add(ctx, event, gui):
 
     todo add -g (打开 GUI 窗口方便输入事项内容)
     """
+    # 'todo add -g' 通知常驻窗口 (见 'todo gui') 的情况已在 cache.main 中处理
     cfg = util.load_cfg()
+    if cfg["read_only"]:
+        check(ctx, "Cannot add items in read-only mode.")
     db = util.load_db(cfg)
 
     if gui:
@@ -165,28 +219,67 @@ def add(ctx, event, gui):
         click.echo(ctx.get_help())
         ctx.exit()
 
-    db["items"].insert(0, new_todoitem(subject))
-    util.update_db(db, cfg)
+    item = new_todoitem(subject)
+    db["items"].insert(0, item)
+    util.update_db(db, cfg, history.new_delta(added=[(0, item)]))
     util.print_result(db)
     ctx.exit()
 
 
 @cli.command(context_settings=CONTEXT_SETTINGS)
-@click.argument("n", nargs=1, type=int)
 @click.pass_context
-def copy(ctx, n):
-    """Copy the content of an event to the clipboard.
+def gui(ctx):
+    """Run a resident GUI window for 'todo add -g'.
 
-    复制指定事项的内容到剪贴板。
+    启动一个常驻后台的隐藏窗口，此后 'todo add -g' 只需通知它显示出来，
+    不必每次重新创建窗口，适合绑定快捷键使用。
 
-    Example: todo copy 3
+    Example: todo gui &
+    """
+    cfg = util.load_cfg()
+    if cfg["read_only"]:
+        check(ctx, "Cannot run the resident GUI in read-only mode.")
+    if resident.is_running():
+        click.echo("The resident GUI is already running.")
+        ctx.exit()
+
+    tk_resident_gui(cfg)
+    ctx.exit()
+
+
+def target_options(f):
+    """多个子命令共用的参数：序号、范围以及筛选条件。"""
+    f = click.option(
+        "text", "-t", "--text", help="Select items whose content contains TEXT."
+    )(f)
+    f = click.option(
+        "status",
+        "-s",
+        "--status",
+        type=click.Choice(
+            [x.name.lower() for x in TodoStatus], case_sensitive=False
+        ),
+        help="Select items with this status.",
+    )(f)
+    return click.argument("targets", nargs=-1)(f)
+
+
+@cli.command(context_settings=CONTEXT_SETTINGS)
+@target_options
+@click.pass_context
+def copy(ctx, targets, status, text):
+    """Copy the content of events to the clipboard.
+
+    复制指定事项的内容到剪贴板（多个事项以换行分隔）。
+
+    Examples: todo copy 3 | todo copy 1-3 | todo copy -t http
     """
     cfg = util.load_cfg()
     db = util.load_db(cfg)
-    err = util.validate_n(db["items"], n)
+    selected, err = util.select_targets(db, targets, status, text)
     check(ctx, err)
 
-    content = db["items"][n - 1]["event"]
+    content = "\n".join(db["items"][i]["event"] for i in selected)
     try:
         pyperclip.copy(content)
     except Exception:
@@ -195,53 +288,68 @@ def copy(ctx, n):
 
 
 @cli.command(context_settings=CONTEXT_SETTINGS)
-@click.argument("n", nargs=1, type=int)
+@target_options
 @click.pass_context
-def done(ctx, n):
-    """Mark the N'th item as 'Completed'.
+def done(ctx, targets, status, text):
+    """Mark items as 'Completed'.
 
-    Example: todo done 1
+    Examples: todo done 1 | todo done 1 3 5-12 | todo done -s incomplete -t report
     """
     cfg = util.load_cfg()
     db = util.load_db(cfg)
-    err = util.validate_n(db["items"], n)
+    selected, err = util.select_targets(db, targets, status, text)
     check(ctx, err)
 
-    idx = n - 1
-    status = db["items"][idx]["status"]
-    repeat = db["items"][idx]["repeat"]
-    if TodoStatus[status] is not TodoStatus.Incomplete:
+    changed = []
+    for idx in selected:
+        item = db["items"][idx]
+        if TodoStatus[item["status"]] is not TodoStatus.Incomplete:
+            if len(selected) > 1:
+                click.echo(f"Warning: {idx+1} is not in the incomplete-list, skipped.")
+            continue
+
+        before = item.copy()
+        if Repeat[item["repeat"]] is Repeat.Never:
+            item["dtime"] = now()
+            item["status"] = TodoStatus.Completed.name
+        else:
+            item["status"] = TodoStatus.Waiting.name
+        item["mtime"] = now()
+        changed.append(history.item_change(idx, before, item))
+
+    if not changed:
         click.echo("Warning: It is not in the incomplete-list, nothing changes.")
         ctx.exit()
 
-    if Repeat[repeat] is Repeat.Never:
-        db["items"][idx]["dtime"] = now()
-        db["items"][idx]["status"] = TodoStatus.Completed.name
-    else:
-        db["items"][idx]["status"] = TodoStatus.Waiting.name
-
-    util.update_db(db, cfg)
+    util.update_db(db, cfg, history.new_delta(changed=changed))
     ctx.exit()
 
 
 @cli.command(context_settings=CONTEXT_SETTINGS)
-@click.argument("n", nargs=1, type=int)
+@target_options
 @click.pass_context
-def delete(ctx, n):
-    """Delete the N'th item. (It will be removed, not marked as completed)
+def delete(ctx, targets, status, text):
+    """Delete items. (They will be removed, not marked as completed)
 
-    Example: todo delete 2
+    Examples: todo delete 2 | todo delete 2 4-6 | todo delete -s completed -t foo
     """
     cfg = util.load_cfg()
     db = util.load_db(cfg)
-    err = util.validate_n(db["items"], n)
+    selected, err = util.select_targets(db, targets, status, text)
     check(ctx, err)
 
-    print(f'{n}. {db["items"][n-1]["event"]}')
-    click.confirm("Confirm deletion (确认删除，不可恢复)", abort=True)
+    for idx in selected:
+        print(f'{idx+1}. {db["items"][idx]["event"]}')
+    delta = history.new_delta(removed=[(i, db["items"][i]) for i in selected])
+    if util.can_undo(delta, cfg):
+        click.confirm("Confirm deletion (确认删除，可用 'todo undo' 恢复)", abort=True)
+    else:
+        click.confirm("Confirm deletion (确认删除，不可恢复)", abort=True)
 
-    del db["items"][n - 1]
-    util.update_db(db, cfg)
+    # 根据同一个快照中的 index 一次性删除，避免序号错位
+    to_delete = set(selected)
+    db["items"] = [x for i, x in enumerate(db["items"]) if i not in to_delete]
+    util.update_db(db, cfg, delta)
     util.print_result(db)
     ctx.exit()
 
@@ -252,38 +360,290 @@ def clean(ctx):
     """Clear the completed list (delete all completed items)."""
     cfg = util.load_cfg()
     db = util.load_db(cfg)
-    items = [
-        x for x in db["items"] if TodoStatus[x["status"]] is not TodoStatus.Completed
-    ]
+    removed = []
+    items = []
+    for idx, item in enumerate(db["items"]):
+        if TodoStatus[item["status"]] is TodoStatus.Completed:
+            removed.append((idx, item))
+        else:
+            items.append(item)
     db["items"] = items
-    util.update_db(db, cfg)
+    util.update_db(db, cfg, history.new_delta(removed=removed))
     util.print_result(db)
     ctx.exit()
 
 
 @cli.command(context_settings=CONTEXT_SETTINGS)
-@click.argument("n", nargs=1, type=int)
+@target_options
 @click.pass_context
-def redo(ctx, n):
-    """Mark the N'th item as 'Incomplete'.
+def redo(ctx, targets, status, text):
+    """Mark items as 'Incomplete'.
 
-    Example: todo redo 1
+    Examples: todo redo 1 | todo redo 1-3 | todo redo -s completed -t report
     """
     cfg = util.load_cfg()
     db = util.load_db(cfg)
-    err = util.validate_n(db["items"], n)
+    selected, err = util.select_targets(db, targets, status, text)
     check(ctx, err)
 
-    idx = n - 1
-    status = db["items"][idx]["status"]
-    if TodoStatus[status] is not TodoStatus.Completed:
+    changed = []
+    for idx in selected:
+        item = db["items"][idx]
+        if TodoStatus[item["status"]] is not TodoStatus.Completed:
+            if len(selected) > 1:
+                click.echo(f"Warning: {idx+1} is not in the completed-list, skipped.")
+            continue
+
+        # ctime 同时也是 ID, 因此要确保一次 redo 多个事项时 ctime 不重复
+        ctime = now() + len(changed) * 0.000001
+        before = item.copy()
+        item["status"] = TodoStatus.Incomplete.name
+        item["ctime"] = ctime
+        item["dtime"] = 0
+        item["mtime"] = ctime
+        changed.append(history.item_change(idx, before, item))
+
+    if not changed:
         click.echo("Warning: It is not in the completed-list, nothing changes.")
         ctx.exit()
 
-    db["items"][idx]["status"] = TodoStatus.Incomplete.name
-    db["items"][idx]["ctime"] = now()
-    db["items"][idx]["dtime"] = 0
+    util.update_db(db, cfg, history.new_delta(changed=changed))
+    ctx.exit()
+
+
+@cli.command(context_settings=CONTEXT_SETTINGS)
+@click.option(
+    "show_all",
+    "-a",
+    "--all",
+    is_flag=True,
+    help="Show all items (including 'Completed' and 'Schedule').",
+)
+@click.option(
+    "interval",
+    "-i",
+    "--interval",
+    type=float,
+    default=1.0,
+    show_default=True,
+    help="Seconds between checks when inotify is unavailable.",
+)
+@click.pass_context
+def watch(ctx, show_all, interval):
+    """Keep showing the todo list, refresh it when the database changes.
+
+    持续显示待办事项列表，只在数据库文件发生变化或日期变化时刷新。
+    按 Ctrl-C 退出。
+    """
+    cfg = util.load_cfg()
+    watcher = Watcher(cfg["db_path"], interval)
+    try:
+        while True:
+            try:
+                db = util.load_db(cfg)
+            except click.ClickException:
+                # 可能读到了正在写入的文件，等待下一次变化
+                watcher.wait()
+                continue
+            util.update_schedules(db, cfg)
+            watcher.reset()
+            click.clear()
+            print_listing(db, show_all)
+            watcher.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    ctx.exit()
+
+
+@cli.command("archive", context_settings=CONTEXT_SETTINGS)
+@click.option(
+    "days",
+    "-d",
+    "--days",
+    type=click.IntRange(min=0),
+    default=0,
+    help="Only archive items completed more than DAYS days ago.",
+)
+@click.option("show_list", "-l", "--list", is_flag=True, help="List the segments.")
+@click.pass_context
+def archive_cmd(ctx, days, show_list):
+    """Move completed items into a compressed archive.
+
+    把已完成的事项移出数据库，压缩保存到数据库旁边的归档文件夹中，
+    使数据库保持小巧。归档后的事项仍会被 'todo stats' 统计，但不能再撤销。
+    """
+    cfg = util.load_cfg()
+    folder = archive.archive_dir(cfg["db_path"])
+
+    if show_list:
+        print(f"\nArchive [{folder}]\n------------")
+        paths = archive.segment_paths(folder)
+        if not paths:
+            print("(none)")
+        for path in paths:
+            h = archive.read_header(path)
+            first = arrow.get(h["min_dtime"]).to("local").format(util.DateFormat)
+            last = arrow.get(h["max_dtime"]).to("local").format(util.DateFormat)
+            print(f"{path.name}: {h['count']} items [{first} ~ {last}]")
+        print()
+        ctx.exit()
+
+    if cfg["read_only"]:
+        check(ctx, "Cannot archive in read-only mode.")
+
+    db = util.load_db(cfg)
+    before = now() - days * 86400
+    cold = [
+        x
+        for x in db["items"]
+        if TodoStatus[x["status"]] is TodoStatus.Completed and x["dtime"] <= before
+    ]
+    if not cold:
+        check(ctx, "There is no completed item to archive.")
+
+    # 先写入归档再修改数据库，中途出错时最多只会重复，不会丢失事项
+    path = archive.write_segment(folder, cold)
+    cold_ctimes = {x["ctime"] for x in cold}
+    db["items"] = [x for x in db["items"] if x["ctime"] not in cold_ctimes]
+    util.update_db(db, cfg)
+
+    # 归档后的事项不能再撤销，旧的历史记录可能引用它们，因此清空
+    history.write_history(history.new_history(cfg["db_path"]), util.todo_history_path)
+    click.echo(f"{len(cold)} items archived to {path}")
+    click.echo("The undo history has been cleared.")
+    ctx.exit()
+
+
+@cli.command(context_settings=CONTEXT_SETTINGS)
+@click.argument("words", nargs=-1)
+@click.option(
+    "sort",
+    "--sort",
+    type=click.Choice(query.SortFields),
+    help="Sort the result by this field.",
+)
+@click.option("reverse", "-r", "--reverse", is_flag=True, help="Reverse the order.")
+@click.pass_context
+def ls(ctx, words, sort, reverse):
+    """List items matching a query.
+
+    \b
+    Fields: status, repeat, text, s_date, n_date, ctime, dtime
+    Operators: ':' '=' '<' '<=' '>' '>='
+    A word without a field means 'text:word'.
+
+    Example: todo ls 'status:incomplete n_date<2026-11-01 report' --sort dtime
+    """
+    pred, err = query.compile_query(" ".join(words))
+    check(ctx, err)
+
+    cfg = util.load_cfg()
+    db = util.load_db(cfg)
+    result = [(idx, item) for idx, item in enumerate(db["items"]) if pred(item)]
+    if sort:
+        result.sort(key=lambda x: x[1][sort], reverse=reverse)
+    elif reverse:
+        result.reverse()
+
+    print(f"\nResult ({len(result)})\n------------")
+    if not result:
+        print("(none)")
+    for idx, item in result:
+        print(f"{idx+1}. [{item['status']}] {item['event']}")
+    print()
+    ctx.exit()
+
+
+@cli.command(context_settings=CONTEXT_SETTINGS)
+@click.option(
+    "days",
+    "-d",
+    "--days",
+    type=click.IntRange(min=1),
+    default=14,
+    show_default=True,
+    help="Count completed items per day for the last DAYS days.",
+)
+@click.option(
+    "weeks",
+    "-w",
+    "--weeks",
+    type=click.IntRange(min=1),
+    default=8,
+    show_default=True,
+    help="Count completed items per week for the last WEEKS weeks.",
+)
+@click.pass_context
+def stats(ctx, days, weeks):
+    """Show statistics about completed and incomplete items.
+
+    统计每天/每周完成的数量、从创建到完成所用的时间、积压事项的年龄分布，
+    以及周期计划的执行情况（包括已归档的事项，见 'todo archive'）。
+    """
+    cfg = util.load_cfg()
+    db = util.load_db(cfg)
+    items = db["items"]
+
+    # 同一个事项可能同时存在于数据库与归档中 (例如合并了另一台电脑的数据库),
+    # 也可能被两台电脑分别归档，因此按 ctime 去重
+    seen = {x["ctime"] for x in items}
+    for segment in archive.iter_items(archive.archive_dir(cfg["db_path"])):
+        for item in segment:
+            if item["ctime"] not in seen:
+                seen.add(item["ctime"])
+                items.append(item)
+    print_stats(items, days, weeks)
+    ctx.exit()
+
+
+def step_history(ctx: click.Context, from_key: str, to_key: str) -> None:
+    """从 from_key 栈中取出一条修改记录并应用，然后放进 to_key 栈。"""
+    cfg = util.load_cfg()
+    hist = util.load_history(cfg)
+    if not hist[from_key]:
+        check(ctx, f"There is nothing to {from_key}.")
+
+    db = util.load_db(cfg)
+    entry = hist[from_key].pop()
+    delta = entry["delta"]
+    if from_key == "undo":
+        delta = history.invert_delta(delta)
+    if missing := history.apply_delta(db, delta):
+        # 更早的记录都建立在这条记录之上，因此一并作废，数据库保持不变
+        hist[from_key] = []
+        history.write_history(hist, util.todo_history_path)
+        check(
+            ctx,
+            f"Cannot {from_key} 'todo {entry['cmd']}': {missing} item(s) no longer "
+            f"exist (archived or changed elsewhere). The {from_key} history "
+            "has been cleared.",
+        )
+    hist[to_key].append(entry)
+
     util.update_db(db, cfg)
+    history.write_history(hist, util.todo_history_path)
+    click.echo(f"{from_key}: todo {entry['cmd']}")
+    util.print_result(db)
+
+
+@cli.command(context_settings=CONTEXT_SETTINGS)
+@click.pass_context
+def undo(ctx):
+    """Undo the last change to the database.
+
+    撤销上一次修改（可多次撤销，历史记录的体积上限见配置文件中的 history_size）。
+    """
+    step_history(ctx, "undo", "redo")
+    ctx.exit()
+
+
+@cli.command("redo-op", context_settings=CONTEXT_SETTINGS)
+@click.pass_context
+def redo_op(ctx):
+    """Redo the last undone change. (See 'todo undo')"""
+    step_history(ctx, "redo", "undo")
     ctx.exit()
 
 
@@ -332,8 +692,10 @@ def repeat(ctx, n, every, start: str):
             s_date = arrow.get(start)
 
     idx = n - 1
+    before = db["items"][idx].copy()
     util.make_schedule(db, idx, every, s_date, ctx)
-    util.update_db(db, cfg)
+    change = history.item_change(idx, before, db["items"][idx])
+    util.update_db(db, cfg, history.new_delta(changed=[change]))
     ctx.exit()
 
 
@@ -358,8 +720,47 @@ def edit(ctx, args):
         click.echo(ctx.get_help())
         ctx.exit()
 
-    db["items"][n - 1]["event"] = subject
-    util.update_db(db, cfg)
+    item = db["items"][n - 1]
+    before = item.copy()
+    item["event"] = subject
+    item["mtime"] = now()
+    change = history.item_change(n - 1, before, item)
+    util.update_db(db, cfg, history.new_delta(changed=[change]))
+    ctx.exit()
+
+
+@cli.command(context_settings=CONTEXT_SETTINGS)
+@click.argument("other", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "base",
+    "-b",
+    "--base",
+    type=click.Path(exists=True, dir_okay=False),
+    help="The common ancestor of both databases (optional).",
+)
+@click.pass_context
+def merge(ctx, other, base):
+    """Merge another copy of the database into the current one.
+
+    合并数据库的另一个版本（例如同步文件夹产生的冲突副本）。
+    如果提供了共同祖先 (--base), 则能正确处理删除操作，否则取并集。
+    已归档的事项 (见 'todo archive') 不会被对方的数据库带回来。
+
+    Example: todo merge "todo-db (conflict).json" -b todo-db.old.json
+    """
+    cfg = util.load_cfg()
+    db = util.load_db(cfg)
+    theirs = util.load_db_from(other)
+    base_db = util.load_db_from(base) if base else None
+
+    merged = merge_dbs(db, theirs, base_db)
+
+    # merge_dbs 不知道归档的存在，没有 --base 时本机已归档的事项会被当作对方新增的事项
+    archived = archive.archived_ctimes(archive.archive_dir(cfg["db_path"]))
+    if archived:
+        merged["items"] = [x for x in merged["items"] if x["ctime"] not in archived]
+    util.update_db(merged, cfg, history.make_delta(db, merged))
+    util.print_result(merged)
     ctx.exit()
 
 
@@ -407,6 +808,7 @@ def motto(
     mottos = db["mottos"]
     hide_motto = db["hide_motto"]
     select_n = db["select_motto"]
+    before = history.snapshot_fields(db)
 
     if show_list:
         util.print_mottos(mottos, hide_motto, select_n)
@@ -414,12 +816,12 @@ def motto(
 
     if is_show:
         db["hide_motto"] = False
-        util.update_db(db, cfg)
+        util.update_db(db, cfg, history.fields_delta(before, db))
         ctx.exit()
 
     if is_hide:
         db["hide_motto"] = True
-        util.update_db(db, cfg)
+        util.update_db(db, cfg, history.fields_delta(before, db))
         ctx.exit()
 
     if sentence:
@@ -428,7 +830,7 @@ def motto(
             click.echo(ctx.get_help())
             ctx.exit()
         db["mottos"].append(sentence)
-        util.update_db(db, cfg)
+        util.update_db(db, cfg, history.fields_delta(before, db))
         ctx.exit()
 
     if edit:
@@ -436,19 +838,19 @@ def motto(
         err = util.validate_n(db["mottos"], n)
         check(ctx, err)
         db["mottos"][n - 1] = value
-        util.update_db(db, cfg)
+        util.update_db(db, cfg, history.fields_delta(before, db))
         ctx.exit()
 
     if randomly:
         db["select_motto"] = 0
-        util.update_db(db, cfg)
+        util.update_db(db, cfg, history.fields_delta(before, db))
         ctx.exit()
 
     if select:
         err = util.validate_n(db["mottos"], select)
         check(ctx, err)
         db["select_motto"] = select
-        util.update_db(db, cfg)
+        util.update_db(db, cfg, history.fields_delta(before, db))
         ctx.exit()
 
     if top:
@@ -456,7 +858,7 @@ def motto(
         check(ctx, err)
         item = db["mottos"].pop(top - 1)
         db["mottos"].insert(0, item)
-        util.update_db(db, cfg)
+        util.update_db(db, cfg, history.fields_delta(before, db))
         util.print_mottos(mottos, hide_motto, select_n)
         ctx.exit()
 
@@ -464,7 +866,7 @@ def motto(
         err = util.validate_n(db["mottos"], del_n)
         check(ctx, err)
         del db["mottos"][del_n - 1]
-        util.update_db(db, cfg)
+        util.update_db(db, cfg, history.fields_delta(before, db))
         util.print_mottos(mottos, hide_motto, select_n)
         ctx.exit()
 
@@ -472,10 +874,5 @@ def motto(
     ctx.exit()
 
 
-# 初始化
-cfg = util.ensure_db_file()
-db_path = cfg["db_path"]
-util.upgrade_to_v016()
-
 if __name__ == "__main__":
     cli(obj={})
@@ -0,0 +1,107 @@
+"""合并同一个数据库的多个版本（例如放在同步文件夹里被两台电脑分别修改后产生的冲突副本）
+
+以 ctime 作为事项的 ID, 逐个事项、逐个字段进行三路合并 (three-way merge),
+双方都修改了同一字段时，以 mtime 较新的一方为准 (last-writer-wins)。
+全程只使用字典查找，时间复杂度为 O(n).
+
+本模块只合并数据库本身，不读取归档 (见 simpletodo.archive)。
+一方已归档、另一方仍在数据库中的事项，在没有共同祖先时会被当作对方新增的事项，
+因此 'todo merge' 会在合并后去掉本机已归档的事项。
+"""
+
+from typing import Any
+
+from simpletodo.model import DB, TodoItem, TodoList, default_mtime
+
+# 参与合并的字段 (ctime 是 ID, mtime 单独处理)
+ItemFields = [k for k in TodoItem.__annotations__ if k not in ("ctime", "mtime")]
+
+
+def item_mtime(item: TodoItem) -> float:
+    """通过 util.load_db_from 读取的事项总是有 mtime, 这里只是以防万一。"""
+    return item.get("mtime") or default_mtime(item)
+
+
+def merge_value(ours: Any, theirs: Any, base: Any, theirs_newer: bool) -> Any:
+    """三路合并一个值。如果没有 base (两路合并), 则 base 应设为 None."""
+    if ours == theirs:
+        return ours
+    if base is not None:
+        if ours == base:
+            return theirs
+        if theirs == base:
+            return ours
+    return theirs if theirs_newer else ours
+
+
+def merge_item(ours: TodoItem, theirs: TodoItem, base: TodoItem | None) -> TodoItem:
+    ours_mtime = item_mtime(ours)
+    theirs_mtime = item_mtime(theirs)
+    theirs_newer = theirs_mtime > ours_mtime
+    item = ours.copy()
+    for k in ItemFields:
+        b = base[k] if base is not None else None
+        item[k] = merge_value(ours[k], theirs[k], b, theirs_newer)
+    item["mtime"] = max(ours_mtime, theirs_mtime)
+    return item
+
+
+def merge_items(ours: TodoList, theirs: TodoList, base: TodoList | None) -> TodoList:
+    """合并事项列表，保持 ours 的顺序，仅存在于 theirs 中的新事项放在最前面。
+
+    有 base 时，一方删除了某事项而另一方没有修改它，则删除；
+    如果另一方修改了它，则保留修改后的事项（修改优先于删除）。
+    没有 base 时无法判断删除，因此取并集。
+
+    注意: 'todo redo' 会改变 ctime, 因此在没有 base 的情况下，
+    被 redo 的事项可能会出现两次。
+    """
+    theirs_map = {x["ctime"]: x for x in theirs}
+    base_map = {x["ctime"]: x for x in base} if base is not None else {}
+    ours_ctimes = {x["ctime"] for x in ours}
+
+    added = [
+        x
+        for x in theirs
+        if x["ctime"] not in ours_ctimes and x["ctime"] not in base_map
+    ]
+    merged: TodoList = []
+    for item in ours:
+        ctime = item["ctime"]
+        base_item = base_map.get(ctime)
+        their_item = theirs_map.get(ctime)
+        if their_item is None:
+            if base_item is None or item != base_item:
+                # 对方没有这个事项，并且它是我方新增的或我方修改过的
+                merged.append(item)
+            continue
+        merged.append(merge_item(item, their_item, base_item))
+
+    # 我方已删除，但对方修改过的事项（修改优先于删除）
+    for ctime, base_item in base_map.items():
+        if ctime in ours_ctimes:
+            continue
+        their_item = theirs_map.get(ctime)
+        if their_item is not None and their_item != base_item:
+            added.append(their_item)
+
+    return added + merged
+
+
+def merge_dbs(ours: DB, theirs: DB, base: DB | None = None) -> DB:
+    """合并两个 (或三个, 包括共同祖先 base) 版本的数据库，返回一个新的数据库。
+
+    u_date 取较早者，以确保下次执行 'todo' 时重新刷新周期计划。
+    格言等其他设置只进行三路合并，无法判断先后时以 ours 为准。
+    """
+    db = ours.copy()
+    db["items"] = merge_items(
+        ours["items"], theirs["items"], base["items"] if base else None
+    )
+    db["u_date"] = min(ours["u_date"], theirs["u_date"])
+    for k in ("hide_motto", "select_motto", "mottos"):
+        b = base[k] if base else None
+        db[k] = merge_value(ours[k], theirs[k], b, False)
+    if db["select_motto"] > len(db["mottos"]):
+        db["select_motto"] = 0
+    return db
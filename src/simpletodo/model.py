@@ -37,6 +37,34 @@ class TodoItem(TypedDict):
     repeat: str  # Repeat
     s_date: str  # start-date, 第一次提醒日期, "YYYY-MM-DD"
     n_date: str  # next-date, 下次提醒日期, "YYYY-MM-DD"
+    mtime: float  # modify-time, 最后修改时间, 用于多台电脑之间的同步合并
+
+
+def check_item(item: dict) -> ErrMsg:
+    """检查一个事项的字段是否齐全、类型是否正确（不修改事项）。
+
+    旧版本的事项没有 mtime, 读取数据库时会自动补上 (见 default_mtime)。
+    """
+    if not isinstance(item, dict):
+        return "not an object"
+    for k in ("ctime", "dtime"):
+        if not isinstance(item.get(k), (int, float)):
+            return f"'{k}' should be a number"
+    for k in ("event", "s_date", "n_date"):
+        if not isinstance(item.get(k), str):
+            return f"'{k}' should be a string"
+    if item.get("status") not in TodoStatus.__members__:
+        return f"unknown status: {item.get('status')}"
+    if item.get("repeat") not in Repeat.__members__:
+        return f"unknown repeat: {item.get('repeat')}"
+    if "mtime" in item and not isinstance(item["mtime"], (int, float)):
+        return "'mtime' should be a number"
+    return ""
+
+
+def default_mtime(item: TodoItem) -> float:
+    """旧版本的事项没有 mtime, 此时用 ctime 与 dtime 中较大者代替。"""
+    return max(item["ctime"], item["dtime"])
 
 
 TodoList = list[TodoItem]
@@ -44,14 +72,16 @@ IdxTodoList = list[tuple[int, TodoItem]]  # list of (index, item)
 
 
 def new_todoitem(event: str) -> TodoItem:
+    ctime = now()
     return TodoItem(
-        ctime=now(),
+        ctime=ctime,
         dtime=0,
         event=event,
         status=TodoStatus.Incomplete.name,
         repeat=Repeat.Never.name,
         s_date="",
         n_date="",
+        mtime=ctime,
     )
 
 
@@ -67,6 +97,26 @@ def new_db() -> DB:
     return DB(u_date="", items=[], hide_motto=False, select_motto=0, mottos=[])
 
 
+def check_db(db: DB) -> ErrMsg:
+    """检查数据库整体的格式（不包括每个事项，见 check_item）。"""
+    if not isinstance(db["u_date"], str):
+        return "'u_date' should be a string"
+    if not isinstance(db["items"], list):
+        return "'items' should be a list"
+    if not isinstance(db["hide_motto"], bool):
+        return "'hide_motto' should be true or false"
+    mottos = db["mottos"]
+    if not isinstance(mottos, list) or not all(isinstance(x, str) for x in mottos):
+        return "'mottos' should be a list of strings"
+    n = db["select_motto"]
+    if not isinstance(n, int) or isinstance(n, bool) or not 0 <= n <= len(mottos):
+        return f"'select_motto' should be an integer between 0 and {len(mottos)}"
+    return ""
+
+
 class TodoConfig(TypedDict):
     db_path: str
     upgrade: str  # 用于避免重复执行升级程序
+    history_size: int  # 撤销历史记录文件的体积上限 (bytes), 设为零则不记录
+    trusted_db: bool  # 为真时读取数据库不检查事项格式（速度更快）
+    read_only: bool  # 只读模式，不对任何文件进行写入（包括刷新周期计划）
@@ -0,0 +1,22 @@
+"""各种文件的位置
+
+本模块不依赖 arrow 等较慢的库，以便 simpletodo.cache 能快速启动。
+"""
+
+from pathlib import Path
+from appdirs import AppDirs
+
+todo_cfg_name = "todo-config.json"
+todo_db_name = "todo-db.json"
+todo_history_name = "todo-history.json"
+
+app_dirs = AppDirs("todo", "github-ahui2016")
+app_config_dir = Path(app_dirs.user_config_dir)
+app_cache_dir = Path(app_dirs.user_cache_dir)
+todo_cfg_path = app_config_dir.joinpath(todo_cfg_name)
+default_db_path = app_config_dir.joinpath(todo_db_name)
+todo_history_path = app_config_dir.joinpath(todo_history_name)
+
+# 'todo' 与 'todo -a' 的输出缓存
+list_cache_path = app_cache_dir.joinpath("todo-list.cache")
+list_all_cache_path = app_cache_dir.joinpath("todo-list-all.cache")
@@ -0,0 +1,146 @@
+"""'todo ls' 的查询条件
+
+查询条件形如 'status:incomplete repeat:week n_date<2026-11-01 text:report',
+先解析并编译为一个判断函数 (predicate), 然后只需遍历一次全部事项即可得到结果。
+
+支持的字段与运算符:
+
+- status, repeat: ':' 或 '=' (不区分大小写)
+- text (即 event): ':' 包含 (不区分大小写), '=' 完全相同
+- s_date, n_date: ':' '=' '<' '<=' '>' '>=', 值为日期 "YYYY-MM-DD" 或 today
+- ctime, dtime: 同上，值为日期 "YYYY-MM-DD" 或 today, ':' 与 '=' 表示同一天
+
+其他词语（包括没有字段名的词语）等同于 text:词语
+"""
+
+import operator
+import re
+import shlex
+from typing import Any, Callable
+
+import arrow
+
+from simpletodo.model import ErrMsg, Repeat, TodoItem, TodoStatus
+
+Predicate = Callable[[TodoItem], bool]
+
+# 只识别已知的字段名，因此 'http://example.com' 之类的词语会被当作 text
+TermPattern = re.compile(
+    r"^(status|repeat|text|event|s_date|n_date|ctime|dtime)(:|<=|>=|<|>|=)(.*)$"
+)
+Operators = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "=": operator.eq,
+    ":": operator.eq,
+}
+SortFields = ["ctime", "dtime", "n_date", "s_date", "event", "status"]
+
+
+def enum_predicate(
+    field: str, op: str, value: str, names: Any
+) -> tuple[Predicate | None, ErrMsg]:
+    if op not in (":", "="):
+        return None, f"Operator '{op}' is not supported by '{field}'."
+    value = value.capitalize()
+    if value not in names:
+        return None, f"Unknown {field}: {value}"
+    return lambda x: x[field] == value, ""
+
+
+def text_predicate(op: str, value: str) -> tuple[Predicate | None, ErrMsg]:
+    if op == ":":
+        value = value.lower()
+        return lambda x: value in x["event"].lower(), ""
+    if op == "=":
+        return lambda x: x["event"] == value, ""
+    return None, f"Operator '{op}' is not supported by 'text'."
+
+
+def date_predicate(field: str, op: str, value: str) -> tuple[Predicate | None, ErrMsg]:
+    try:
+        day = arrow.now() if value == "today" else arrow.get(value)
+    except (ValueError, TypeError, arrow.parser.ParserError):
+        return None, f"Invalid date: {value}"
+    date = day.format("YYYY-MM-DD")
+    cmp = Operators[op]
+    # 未设置日期 (空字符串) 的事项不参与比较
+    return lambda x: x[field] != "" and cmp(x[field], date), ""
+
+
+def time_predicate(field: str, op: str, value: str) -> tuple[Predicate | None, ErrMsg]:
+    try:
+        day = arrow.now() if value == "today" else arrow.get(value, tzinfo="local")
+    except (ValueError, TypeError, arrow.parser.ParserError):
+        return None, f"Invalid date: {value}"
+    start = day.floor("day").timestamp()
+    end = day.ceil("day").timestamp()
+    match op:
+        case ":" | "=":
+            return lambda x: start <= x[field] <= end, ""
+        case "<":
+            return lambda x: 0 < x[field] < start, ""
+        case "<=":
+            return lambda x: 0 < x[field] <= end, ""
+        case ">":
+            return lambda x: x[field] > end, ""
+        case _:
+            return lambda x: x[field] >= start, ""
+
+
+def term_predicate(field: str, op: str, value: str) -> tuple[Predicate | None, ErrMsg]:
+    """把一个查询条件 (字段, 运算符, 值) 转换为判断函数。"""
+    match field:
+        case "status":
+            return enum_predicate(field, op, value, TodoStatus.__members__)
+        case "repeat":
+            return enum_predicate(field, op, value, Repeat.__members__)
+        case "text" | "event":
+            return text_predicate(op, value)
+        case "s_date" | "n_date":
+            return date_predicate(field, op, value)
+        case "ctime" | "dtime":
+            return time_predicate(field, op, value)
+        case _:
+            return None, f"Unknown field: {field}"
+
+
+def compile_terms(terms: list[tuple[str, str, str]]) -> tuple[Predicate, ErrMsg]:
+    """把多个查询条件组合成一个判断函数（全部条件都满足才为真）。"""
+    preds: list[Predicate] = []
+    for field, op, value in terms:
+        pred, err = term_predicate(field, op, value)
+        if err:
+            return lambda _: False, err
+        preds.append(pred)
+
+    match len(preds):
+        case 0:
+            return lambda _: True, ""
+        case 1:
+            return preds[0], ""
+        case _:
+            return lambda x: all(p(x) for p in preds), ""
+
+
+def parse_query(query: str) -> tuple[list[tuple[str, str, str]], ErrMsg]:
+    try:
+        words = shlex.split(query)
+    except ValueError as e:
+        return [], f"Invalid query: {e}"
+    terms = []
+    for word in words:
+        if m := TermPattern.match(word):
+            terms.append((m.group(1), m.group(2), m.group(3)))
+        else:
+            terms.append(("text", ":", word))
+    return terms, ""
+
+
+def compile_query(query: str) -> tuple[Predicate, ErrMsg]:
+    terms, err = parse_query(query)
+    if err:
+        return lambda _: False, err
+    return compile_terms(terms)
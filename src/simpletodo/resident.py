@@ -0,0 +1,107 @@
+"""常驻后台的 GUI 窗口 ('todo gui') 与其客户端 ('todo add -g') 之间的通信
+
+如果系统支持 AF_UNIX, 常驻窗口监听缓存文件夹中的一个 socket 文件（权限为 0600,
+只有当前用户能连接）；否则监听本机的一个 TCP 端口，端口号与一个随机 token
+保存在缓存文件夹中，客户端必须发送正确的 token.
+常驻窗口收到消息后回复 OkMsg, 客户端据此判断常驻窗口确实在运行（而不是残留的文件）。
+'todo gui' 启动时发送 PingMsg 检查是否已有常驻窗口，不会使其显示出来。
+本模块只依赖标准库，以便 'todo add -g' 能快速启动。
+"""
+
+import os
+import secrets
+import socket
+from typing import NamedTuple
+
+from simpletodo.paths import app_cache_dir
+
+gui_socket_path = app_cache_dir.joinpath("todo-gui.sock")
+gui_port_path = app_cache_dir.joinpath("todo-gui.port")
+ShowMsg = b"show"
+PingMsg = b"ping"  # 只确认常驻窗口是否在运行，不显示窗口
+OkMsg = b"ok"
+use_unix_socket = hasattr(socket, "AF_UNIX")
+
+
+class Server(NamedTuple):
+    sock: socket.socket
+    token: bytes  # TCP 模式下客户端必须附带的 token, AF_UNIX 模式下为空
+
+
+def listen() -> Server:
+    """开始监听，并把地址写入缓存文件夹。"""
+    app_cache_dir.mkdir(parents=True, exist_ok=True)
+    if use_unix_socket:
+        # 残留的 socket 文件（例如上次异常退出）直接删除
+        gui_socket_path.unlink(missing_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            sock.bind(str(gui_socket_path))
+        finally:
+            os.umask(old_umask)
+        token = ""
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(("127.0.0.1", 0))
+        token = secrets.token_hex(16)
+        gui_port_path.write_text(f"{sock.getsockname()[1]} {token}")
+    sock.listen()
+    sock.setblocking(False)
+    return Server(sock, token.encode())
+
+
+def stop(server: Server) -> None:
+    server.sock.close()
+    if use_unix_socket:
+        gui_socket_path.unlink(missing_ok=True)
+    else:
+        gui_port_path.unlink(missing_ok=True)
+
+
+def receive(server: Server) -> bytes:
+    """接收一条消息 (ShowMsg 或 PingMsg), 如果正确则回复 OkMsg 并返回该消息，
+    否则返回空字节串。"""
+    try:
+        conn, _ = server.sock.accept()
+    except BlockingIOError:
+        return b""
+    with conn:
+        conn.settimeout(1)
+        try:
+            msg, _, token = conn.recv(64).partition(b" ")
+            if msg not in (ShowMsg, PingMsg) or token != server.token:
+                return b""
+            conn.sendall(OkMsg)
+        except OSError:
+            return b""
+    return msg
+
+
+def send(msg: bytes) -> bool:
+    """向常驻窗口发送一条消息。如果常驻窗口未运行，返回 False."""
+    try:
+        if use_unix_socket:
+            address: str | tuple[str, int] = str(gui_socket_path)
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            port, token = gui_port_path.read_text().split()
+            address = ("127.0.0.1", int(port))
+            conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            msg = msg + b" " + token.encode()
+        with conn:
+            conn.settimeout(0.5)
+            conn.connect(address)
+            conn.sendall(msg)
+            return conn.recv(16) == OkMsg
+    except (OSError, ValueError):
+        return False
+
+
+def show_window() -> bool:
+    """通知常驻窗口显示出来。如果常驻窗口未运行，返回 False."""
+    return send(ShowMsg)
+
+
+def is_running() -> bool:
+    return send(PingMsg)
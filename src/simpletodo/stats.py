@@ -0,0 +1,174 @@
+"""'todo stats' 统计分析
+
+先把 ctime/dtime/status/repeat 一次性转换为紧凑的数值数组 (array.array),
+然后批量计算。如果安装了 numpy 则直接在这些数组上做向量运算（不需要复制），
+否则使用纯 Python 实现（结果相同）。
+"""
+
+import datetime
+import time
+from array import array
+from typing import NamedTuple
+
+import arrow
+
+from simpletodo.model import Repeat, TodoList, TodoStatus
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+Day = 86400
+Week = 7 * Day
+Percentiles = [50, 90, 99]
+
+# 积压事项的年龄分布 (days), 每个区间的下限
+AgeEdges = [0, 1, 7, 30, 365]
+AgeLabels = ["< 1 day", "1-7 days", "7-30 days", "30-365 days", "> 1 year"]
+
+
+class Columns(NamedTuple):
+    ctime: array
+    dtime: array
+    status: array  # TodoStatus.value
+    repeat: array  # Repeat.value
+
+
+def to_columns(items: TodoList) -> Columns:
+    status = {x.name: x.value for x in TodoStatus}
+    repeat = {x.name: x.value for x in Repeat}
+    return Columns(
+        ctime=array("d", (x["ctime"] for x in items)),
+        dtime=array("d", (x["dtime"] for x in items)),
+        status=array("b", (status[x["status"]] for x in items)),
+        repeat=array("b", (repeat[x["repeat"]] for x in items)),
+    )
+
+
+def percentiles(values: list[float], qs: list[int]) -> list[float]:
+    """线性插值的百分位数 (与 numpy.percentile 的默认算法相同)。"""
+    values = sorted(values)
+    result = []
+    for q in qs:
+        pos = (len(values) - 1) * q / 100
+        lo = int(pos)
+        hi = min(lo + 1, len(values) - 1)
+        result.append(values[lo] + (values[hi] - values[lo]) * (pos - lo))
+    return result
+
+
+def bucket(age: float) -> int:
+    i = 0
+    while i + 1 < len(AgeEdges) and age >= AgeEdges[i + 1]:
+        i += 1
+    return i
+
+
+class Summary(NamedTuple):
+    per_day: list[int]  # 最近 N 天每天完成的数量，最早的在前
+    per_week: list[int]  # 最近 N 周每周完成的数量，最早的在前
+    lead_time: list[float]  # 从创建到完成的天数的百分位数 (Percentiles)
+    ages: list[int]  # 积压事项的年龄分布 (AgeEdges)
+
+
+def summarize(cols: Columns, now: float, days: int, weeks: int) -> Summary:
+    # 以本地时间的明天零时作为统计区间的终点
+    offset = time.localtime(now).tm_gmtoff
+    end = (now + offset) // Day * Day + Day - offset
+    completed = TodoStatus.Completed.value
+    incomplete = TodoStatus.Incomplete.value
+    never = Repeat.Never.value
+
+    if np is not None:
+        ctime = np.frombuffer(cols.ctime, dtype=np.float64)
+        dtime = np.frombuffer(cols.dtime, dtype=np.float64)
+        status = np.frombuffer(cols.status, dtype=np.int8)
+        repeat = np.frombuffer(cols.repeat, dtype=np.int8)
+
+        done = (status == completed) & (dtime > 0)
+        d = dtime[done]
+
+        def count_bins(width: int, n: int) -> list[int]:
+            start = end - width * n
+            idx = ((d[(d >= start) & (d < end)] - start) // width).astype(np.int64)
+            return np.bincount(idx, minlength=n).tolist()
+
+        lead = (d - ctime[done]) / Day
+        lead_time = np.percentile(lead, Percentiles).tolist() if lead.size else []
+        age = (now - ctime[(status == incomplete) & (repeat == never)]) / Day
+        idx = np.searchsorted(np.asarray(AgeEdges[1:]), age, side="right")
+        ages = np.bincount(idx, minlength=len(AgeEdges)).tolist()
+        return Summary(count_bins(Day, days), count_bins(Week, weeks), lead_time, ages)
+
+    per_day = [0] * days
+    per_week = [0] * weeks
+    lead: list[float] = []
+    ages = [0] * len(AgeEdges)
+    day_start = end - Day * days
+    week_start = end - Week * weeks
+    for c, d, s, r in zip(cols.ctime, cols.dtime, cols.status, cols.repeat):
+        if s == completed and d > 0:
+            lead.append((d - c) / Day)
+            if day_start <= d < end:
+                per_day[int((d - day_start) // Day)] += 1
+            if week_start <= d < end:
+                per_week[int((d - week_start) // Week)] += 1
+        elif s == incomplete and r == never:
+            ages[bucket((now - c) / Day)] += 1
+    lead_time = percentiles(lead, Percentiles) if lead else []
+    return Summary(per_day, per_week, lead_time, ages)
+
+
+def previous_date(n_date: str, repeat: Repeat) -> datetime.date:
+    """上一次提醒日期（即当前这一次的到期日）"""
+    date = arrow.get(n_date)
+    match repeat:
+        case Repeat.Week:
+            date = date.shift(weeks=-1)
+        case Repeat.Month:
+            date = date.shift(months=-1)
+        case Repeat.Year:
+            date = date.shift(years=-1)
+    return date.date()
+
+
+def print_schedules(items: TodoList) -> None:
+    """周期计划的执行情况：已按时完成 (Waiting) 与已到期但未完成 (Incomplete) 的数量。"""
+    print("\nSchedule\n------------")
+    schedules = [x for x in items if x["repeat"] != Repeat.Never.name]
+    if not schedules:
+        print("(none)")
+        return
+    today = arrow.now().date()
+    pending = [x for x in schedules if x["status"] == TodoStatus.Incomplete.name]
+    print(f"on schedule: {len(schedules) - len(pending)}/{len(schedules)}")
+    if pending:
+        overdue = [
+            (today - previous_date(x["n_date"], Repeat[x["repeat"]])).days
+            for x in pending
+        ]
+        print(f"pending: {len(pending)}, max overdue: {max(overdue)} days")
+
+
+def print_stats(items: TodoList, days: int = 14, weeks: int = 8) -> None:
+    s = summarize(to_columns(items), time.time(), days, weeks)
+
+    print(f"\nCompleted per day (last {days} days, oldest first)\n------------")
+    print(" ".join(str(x) for x in s.per_day))
+
+    print(f"\nCompleted per week (last {weeks} weeks, oldest first)\n------------")
+    print(" ".join(str(x) for x in s.per_week))
+
+    print("\nLead time (days from creation to completion)\n------------")
+    if not s.lead_time:
+        print("(none)")
+    else:
+        print(", ".join(f"p{q}: {v:.1f}" for q, v in zip(Percentiles, s.lead_time)))
+
+    print("\nBacklog age (incomplete items)\n------------")
+    for label, count in zip(AgeLabels, s.ages):
+        print(f"{label}: {count}")
+
+    print_schedules(items)
+    print()
@@ -1,11 +1,10 @@
 import os
 import shutil
+import sys
 
 import click
-import json
 import arrow
 from pathlib import Path
-from appdirs import AppDirs
 from arrow.arrow import Arrow
 
 from simpletodo.model import (
@@ -15,44 +14,64 @@ from simpletodo.model import (
     Repeat,
     TodoStatus,
     new_db,
+    now,
     TodoConfig,
+    check_db,
+    check_item,
+    default_mtime,
+)
+from simpletodo import archive, cache, codec, history, query
+from simpletodo.cache import env_read_only, read_only_env
+from simpletodo.history import History
+from simpletodo.paths import (
+    app_config_dir,
+    default_db_path,
+    todo_cfg_path,
+    todo_db_name,
+    todo_history_path,
 )
 from . import __version__
 
-todo_cfg_name = "todo-config.json"
-todo_db_name = "todo-db.json"
 DateFormat = "YYYY-MM-DD"
 
-app_dirs = AppDirs("todo", "github-ahui2016")
-app_config_dir = Path(app_dirs.user_config_dir)
-todo_cfg_path = app_config_dir.joinpath(todo_cfg_name)
-default_db_path = app_config_dir.joinpath(todo_db_name)
+default_history_size = 256 * 1024
 
 
 def write_cfg(cfg: TodoConfig) -> None:
-    with open(todo_cfg_path, "w", encoding="utf-8") as f:
-        json.dump(cfg, f, indent=4, ensure_ascii=False)
+    codec.dump_file(cfg, todo_cfg_path)
 
 
 def ensure_cfg_file() -> None:
-    app_config_dir.mkdir(parents=True, exist_ok=True)
     if not todo_cfg_path.exists():
-        default_cfg = TodoConfig(db_path=default_db_path.__str__(), upgrade="0.1.6")
+        app_config_dir.mkdir(parents=True, exist_ok=True)
+        default_cfg = TodoConfig(
+            db_path=default_db_path.__str__(),
+            upgrade="0.1.6",
+            history_size=default_history_size,
+            trusted_db=False,
+            read_only=False,
+        )
         write_cfg(default_cfg)
 
 
 def ensure_db_file() -> TodoConfig:
+    """确保配置文件与数据库存在。只读模式下不创建文件，文件不存在时报错。"""
+    if not todo_cfg_path.exists() and env_read_only():
+        raise click.ClickException(f"{todo_cfg_path} does not exist (read-only mode).")
     ensure_cfg_file()
     cfg = load_cfg()
     db_path = Path(cfg["db_path"])
     if not db_path.exists():
-        with open(db_path, "w", encoding="utf-8") as f:
-            json.dump(new_db(), f, indent=4, ensure_ascii=False)
+        if cfg["read_only"]:
+            raise click.ClickException(f"{db_path} does not exist (read-only mode).")
+        codec.dump_file(new_db(), db_path)
     return cfg
 
 
 def change_db_path(new_path: Path, cfg: TodoConfig) -> ErrMsg:
     """new_path 是一个不存在的文件或一个已存在的文件夹，不能是一个已存在的文件"""
+    if cfg["read_only"]:
+        return "Cannot change the database location in read-only mode."
     new_path = new_path.resolve()
     if new_path.is_dir():
         new_path = new_path.joinpath(todo_db_name)
@@ -61,31 +80,57 @@ def change_db_path(new_path: Path, cfg: TodoConfig) -> ErrMsg:
     old_path = cfg["db_path"]
     shutil.copyfile(old_path, new_path)
     cfg["db_path"] = new_path.__str__()
-    with open(todo_cfg_path, "w", encoding="utf-8") as f:
-        json.dump(cfg, f, indent=4, ensure_ascii=False)
+    write_cfg(cfg)
     os.remove(old_path)
+
+    # 归档文件夹跟随数据库移动 (见 'todo archive')
+    old_archive = archive.archive_dir(old_path)
+    if old_archive.is_dir():
+        shutil.move(old_archive, archive.archive_dir(cfg["db_path"]))
     return ""
 
 
 def load_cfg() -> TodoConfig:
-    with open(todo_cfg_path, "rb") as f:
-        cfg_dict = json.load(f)
-        return TodoConfig(
-            db_path=cfg_dict["db_path"],
-            upgrade=cfg_dict.get("upgrade", ""),
-        )
+    cfg_dict = codec.load_file(todo_cfg_path)
+    return TodoConfig(
+        db_path=cfg_dict["db_path"],
+        upgrade=cfg_dict.get("upgrade", ""),
+        history_size=cfg_dict.get("history_size", default_history_size),
+        trusted_db=cfg_dict.get("trusted_db", False),
+        read_only=cfg_dict.get("read_only", False) or env_read_only(),
+    )
 
 
 def load_db(cfg: TodoConfig) -> DB:
-    with open(cfg["db_path"], "rb") as f:
-        db_dict = json.load(f)
-        return DB(
-            u_date=db_dict.get("u_date", ""),
-            items=db_dict.get("items", []),
-            hide_motto=db_dict.get("hide_motto", False),
-            select_motto=db_dict.get("select_motto", 0),
-            mottos=db_dict.get("mottos", []),
-        )
+    return load_db_from(cfg["db_path"], cfg["trusted_db"])
+
+
+def load_db_from(db_path: str | Path, trusted: bool = False) -> DB:
+    """读取数据库。如果 trusted 为假，则逐个检查事项的格式（只在读取时检查一次）。
+
+    旧版本的事项没有 mtime, 在这里补上 (见 default_mtime), 无论是否 trusted.
+    """
+    try:
+        db_dict = codec.load_file(db_path)
+    except ValueError as e:
+        raise click.ClickException(f"{db_path}: {e}")
+    if not isinstance(db_dict, dict):
+        raise click.ClickException(f"{db_path}: the database should be an object")
+    db = DB(
+        u_date=db_dict.get("u_date", ""),
+        items=db_dict.get("items", []),
+        hide_motto=db_dict.get("hide_motto", False),
+        select_motto=db_dict.get("select_motto", 0),
+        mottos=db_dict.get("mottos", []),
+    )
+    if err := check_db(db):
+        raise click.ClickException(f"{db_path}: {err}")
+    for idx, item in enumerate(db["items"]):
+        if not trusted and (err := check_item(item)):
+            raise click.ClickException(f"{db_path}: item {idx+1}: {err}")
+        if "mtime" not in item:
+            item["mtime"] = default_mtime(item)
+    return db
 
 
 def split_lists(db: DB) -> tuple[IdxTodoList, IdxTodoList, IdxTodoList]:
@@ -110,9 +155,46 @@ def split_lists(db: DB) -> tuple[IdxTodoList, IdxTodoList, IdxTodoList]:
     return todo_list, done_list, repeat_list
 
 
-def update_db(db: DB, cfg: TodoConfig) -> None:
-    with open(cfg["db_path"], "w", encoding="utf-8") as f:
-        json.dump(db, f, indent=4, ensure_ascii=False)
+def update_db(
+    db: DB, cfg: TodoConfig, delta: history.Delta | None = None, cmd: str = ""
+) -> None:
+    """写入数据库。如果提供了本次修改的内容 (delta), 则同时记录到撤销历史中，
+    cmd 为历史记录中显示的命令，默认为当前命令 (见 push_history)。"""
+    if cfg["read_only"]:
+        raise click.ClickException("The database is read-only (read_only mode).")
+    cache.clear_list_cache()
+    codec.dump_file(db, cfg["db_path"])
+    if delta is not None and not history.is_empty(delta):
+        push_history(delta, cfg, cmd)
+
+
+def load_history(cfg: TodoConfig) -> History:
+    try:
+        return history.load_history(todo_history_path, cfg["db_path"])
+    except ValueError as e:
+        raise click.ClickException(
+            f"{todo_history_path}: {e} (delete this file to reset the undo history)"
+        )
+
+
+def can_undo(delta: history.Delta, cfg: TodoConfig) -> bool:
+    """本次修改能否记录到撤销历史中（体积上限见 history_size）。"""
+    return cfg["history_size"] > 0 and history.fits(delta, cfg["history_size"])
+
+
+def push_history(delta: history.Delta, cfg: TodoConfig, cmd: str = "") -> None:
+    """把一次修改记录到撤销历史中，cmd 默认为当前命令。"""
+    if cfg["history_size"] <= 0:
+        return
+    hist = load_history(cfg)
+    cmd = cmd or " ".join(sys.argv[1:])
+    entry = history.HistoryEntry(cmd=cmd, delta=delta)
+    if not history.push_entry(hist, entry, cfg["history_size"]):
+        click.echo(
+            "Warning: This change is larger than 'history_size', "
+            "it cannot be undone."
+        )
+    history.write_history(hist, todo_history_path)
 
 
 def print_mottos(mottos: list[str], is_hide: bool, n: int) -> None:
@@ -190,6 +272,55 @@ def validate_n(a_list: list, n: int) -> ErrMsg:
     return ""
 
 
+def parse_targets(args: tuple[str, ...], a_list: list) -> tuple[list[int], ErrMsg]:
+    """把 ("1", "3", "5-12") 这样的序号与范围转换为从小到大排列、不重复的 index (从零开始)。"""
+    targets: set[int] = set()
+    for arg in args:
+        start, sep, end = arg.partition("-")
+        try:
+            first = int(start)
+            last = int(end) if sep else first
+        except ValueError:
+            return [], f"Invalid number or range: {arg}"
+        if first > last:
+            return [], f"Invalid range: {arg}"
+        for n in (first, last):
+            if err := validate_n(a_list, n):
+                return [], err
+        targets.update(range(first - 1, last))
+    return sorted(targets), ""
+
+
+def select_targets(
+    db: DB, args: tuple[str, ...], status: str | None, text: str | None
+) -> tuple[list[int], ErrMsg]:
+    """根据序号、范围以及状态、文字筛选条件选出事项，返回 index 列表。
+
+    所有 index 都基于同一个数据库快照，因此删除多个事项时序号不会错位。
+    """
+    if args:
+        targets, err = parse_targets(args, db["items"])
+        if err:
+            return [], err
+    elif status or text:
+        targets = list(range(len(db["items"])))
+    else:
+        return [], "Please specify the item numbers or a filter (--status/--text)."
+
+    terms = []
+    if status:
+        terms.append(("status", ":", status))
+    if text:
+        terms.append(("text", ":", text))
+    pred, err = query.compile_terms(terms)
+    if err:
+        return [], err
+    targets = [i for i in targets if pred(db["items"][i])]
+    if not targets:
+        return [], "No item matches."
+    return targets, ""
+
+
 def make_schedule(db: DB, i: int, every: str, start: Arrow, ctx: click.Context) -> None:
     """Set up a new schedule (repeat event)."""
 
@@ -199,8 +330,9 @@ def make_schedule(db: DB, i: int, every: str, start: Arrow, ctx: click.Context)
         click.echo("Error: Cannot start from a past day.")
         ctx.exit()
 
-    # set "s_date"
+    # set "s_date" and "mtime"
     db["items"][i]["s_date"] = start.format(DateFormat)
+    db["items"][i]["mtime"] = now()
 
     # set "dtime"
     # 一个事件只要设置了重复提醒，那么它的 dtime 就必须为零
@@ -250,12 +382,16 @@ def shift_next_date(s_date: Arrow, n_date: Arrow, repeat: Repeat) -> str:
     return next_date
 
 
-def update_schedules(db: DB, cfg: TodoConfig, force: bool = False) -> None:
+def update_schedules(db: DB, cfg: TodoConfig, force: bool = False) -> bool:
+    """刷新周期计划。只读模式下只在内存中刷新（用于显示），不写入数据库。
+
+    返回是否写入了数据库。
+    """
     today = arrow.now().format(DateFormat)
     u_date = today.format(DateFormat)
     if not force and u_date == db["u_date"]:
         # 如果今天已经更新过，就不用更新了（每天只更新一次）
-        return
+        return False
     db["u_date"] = u_date
     for idx, item in enumerate(db["items"]):
         if TodoStatus[item["status"]] is TodoStatus.Waiting and today >= item["n_date"]:
@@ -264,7 +400,11 @@ def update_schedules(db: DB, cfg: TodoConfig, force: bool = False) -> None:
             n_date = arrow.get(item["n_date"])
             next_date = shift_next_date(s_date, n_date, Repeat[item["repeat"]])
             db["items"][idx]["n_date"] = next_date
+            db["items"][idx]["mtime"] = now()
+    if cfg["read_only"]:
+        return False
     update_db(db, cfg)
+    return True
 
 
 def upgrade_to_v016() -> None:
@@ -273,7 +413,7 @@ def upgrade_to_v016() -> None:
     从低于 v0.1.6 升级到 v0.1.6 及以上时自动升级。
     """
     cfg = load_cfg()
-    if cfg["upgrade"] == "0.1.6" or __version__ < "0.1.6":
+    if cfg["read_only"] or cfg["upgrade"] == "0.1.6" or __version__ < "0.1.6":
         return
 
     print("Upgrading to v0.1.6...")
@@ -0,0 +1,91 @@
+"""'todo watch' 使用的文件监视器
+
+在 Linux 中使用 inotify (通过 ctypes 调用 libc, 不需要安装第三方库),
+其他系统则定时检查文件的大小与修改时间。
+"""
+
+import ctypes
+import ctypes.util
+import datetime
+import os
+import select
+import time
+from pathlib import Path
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CLOEXEC = 0o2000000
+
+
+def inotify_watch(path: Path) -> int:
+    """监视 path 所在的文件夹（以便察觉文件被替换），失败时返回 -1."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd = libc.inotify_init1(IN_CLOEXEC)
+    except (OSError, AttributeError):
+        return -1
+    if fd < 0:
+        return -1
+    # 只关心写入完成 (而不是每一次 write) 与文件被替换这两种事件
+    mask = IN_CLOSE_WRITE | IN_MOVED_TO
+    if libc.inotify_add_watch(fd, str(path.parent).encode(), mask) < 0:
+        os.close(fd)
+        return -1
+    return fd
+
+
+def seconds_until_tomorrow() -> float:
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+    midnight = datetime.datetime.combine(tomorrow, datetime.time())
+    return (midnight - datetime.datetime.now()).total_seconds() + 1
+
+
+class Watcher:
+    """等待数据库文件发生变化，或者日期发生变化（需要刷新周期计划）。"""
+
+    def __init__(self, db_path: str, interval: float):
+        self.path = Path(db_path)
+        self.interval = interval  # 不能使用 inotify 时，检查文件的间隔时间（秒）
+        self.fd = inotify_watch(self.path)
+        self.fingerprint = self.stat()
+        self.date = datetime.date.today()
+
+    def stat(self) -> tuple[int, int, int]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return 0, 0, 0
+        return st.st_size, st.st_mtime_ns, st.st_ino
+
+    def reset(self) -> None:
+        """重新记录文件指纹（例如刷新周期计划写入数据库之后），避免重复触发。"""
+        self.fingerprint = self.stat()
+
+    def changed(self) -> bool:
+        fingerprint = self.stat()
+        if fingerprint == self.fingerprint:
+            return False
+        self.fingerprint = fingerprint
+        return True
+
+    def wait(self) -> None:
+        while True:
+            if datetime.date.today() != self.date:
+                self.date = datetime.date.today()
+                return
+
+            timeout = seconds_until_tomorrow()
+            if self.fd >= 0:
+                readable, _, _ = select.select([self.fd], [], [], timeout)
+                if readable:
+                    os.read(self.fd, 64 * 1024)  # 只需清空事件，不必解析
+            else:
+                time.sleep(min(self.interval, timeout))
+
+            if self.changed():
+                return
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
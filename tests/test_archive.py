@@ -0,0 +1,65 @@
+"""已完成事项的压缩归档 (simpletodo.archive)"""
+
+import click
+import pytest
+
+from simpletodo import archive
+from simpletodo.model import TodoItem
+
+
+def make_item(ctime: float, dtime: float) -> TodoItem:
+    return TodoItem(
+        ctime=ctime,
+        dtime=dtime,
+        event=f"item {ctime}",
+        status="Completed",
+        repeat="Never",
+        s_date="",
+        n_date="",
+        mtime=dtime,
+    )
+
+
+def test_write_and_read(tmp_path):
+    folder = tmp_path.joinpath("todo-db.archive")
+    first = [make_item(1, 1000), make_item(2, 2000)]
+    second = [make_item(3, 3000)]
+    archive.write_segment(folder, first)
+    archive.write_segment(folder, second)
+
+    paths = archive.segment_paths(folder)
+    assert len(paths) == 2
+    h = archive.read_header(paths[0])
+    assert (h["count"], h["min_dtime"], h["max_dtime"]) == (2, 1000, 2000)
+    assert list(archive.iter_items(folder)) == [first, second]
+    assert archive.archived_ctimes(folder) == {1, 2, 3}
+
+
+def test_same_items_archived_twice(tmp_path):
+    """两台电脑分别归档同样的事项，分段文件名不会相同。"""
+    folder = tmp_path.joinpath("todo-db.archive")
+    items = [make_item(1, 1000)]
+    assert archive.write_segment(folder, items) != archive.write_segment(folder, items)
+    assert len(archive.segment_paths(folder)) == 2
+
+
+def test_missing_zstandard(tmp_path, monkeypatch):
+    folder = tmp_path.joinpath("todo-db.archive")
+    path = archive.write_segment(folder, [make_item(1, 1000)])
+    header = archive.read_header(path)
+    header["compression"] = "zstd"
+    body = path.read_bytes().partition(b"\n")[2]
+    path.write_bytes(archive.codec.dumps(header, indent=False) + b"\n" + body)
+
+    monkeypatch.setattr(archive, "zstandard", None)
+    with pytest.raises(click.ClickException, match="install zstandard"):
+        archive.read_segment(path)
+
+
+def test_corrupt_segment(tmp_path):
+    folder = tmp_path.joinpath("todo-db.archive")
+    path = archive.write_segment(folder, [make_item(1, 1000)])
+    header = path.read_bytes().partition(b"\n")[0]
+    path.write_bytes(header + b"\ngarbage")
+    with pytest.raises(click.ClickException):
+        archive.read_segment(path)
@@ -0,0 +1,48 @@
+"""'todo' 与 'todo -a' 的输出缓存 (simpletodo.cache)"""
+
+from pathlib import Path
+
+import pytest
+
+from simpletodo import cache
+
+
+@pytest.fixture
+def cache_dir(tmp_path: Path, monkeypatch) -> Path:
+    folder = tmp_path.joinpath("cache")
+    monkeypatch.setattr(cache, "app_cache_dir", folder)
+    monkeypatch.setattr(cache, "list_cache_path", folder.joinpath("todo-list.cache"))
+    monkeypatch.setattr(
+        cache, "list_all_cache_path", folder.joinpath("todo-list-all.cache")
+    )
+    return folder
+
+
+def test_cache_hit(tmp_path, cache_dir):
+    db_path = tmp_path.joinpath("todo-db.json")
+    db_path.write_text('{"items": []}')
+    cache.write_list_cache(cache.cache_key(str(db_path)), False, "first\n")
+    assert cache.read_list_cache(str(db_path), False) == b"first\n"
+    assert cache.read_list_cache(str(db_path), True) is None
+    assert [x.name for x in cache_dir.iterdir()] == ["todo-list.cache"]
+
+
+def test_db_changed_before_cache_written(tmp_path, cache_dir):
+    """读取数据库之后、写入缓存之前，数据库被其他进程修改，旧的输出不应被采用。"""
+    db_path = tmp_path.joinpath("todo-db.json")
+    db_path.write_text('{"items": ["first"]}')
+    key = cache.cache_key(str(db_path))
+
+    db_path.write_text('{"items": ["first", "second"]}')
+    cache.write_list_cache(key, False, "first\n")
+    assert cache.read_list_cache(str(db_path), False) is None
+
+
+def test_clear_list_cache(tmp_path, cache_dir):
+    db_path = tmp_path.joinpath("todo-db.json")
+    db_path.write_text('{"items": []}')
+    key = cache.cache_key(str(db_path))
+    cache.write_list_cache(key, False, "a\n")
+    cache.write_list_cache(key, True, "b\n")
+    cache.clear_list_cache()
+    assert list(cache_dir.iterdir()) == []
@@ -0,0 +1,66 @@
+"""读取数据库与历史记录时的格式检查 (util.load_db_from, history.load_history)"""
+
+import json
+from pathlib import Path
+
+import click
+import pytest
+
+from simpletodo import history, util
+from simpletodo.model import new_db, new_todoitem
+
+
+def write_json(path: Path, obj) -> Path:
+    path.write_text(json.dumps(obj))
+    return path
+
+
+@pytest.mark.parametrize(
+    "content, message",
+    [
+        ("{bad", ""),
+        ("[]", "should be an object"),
+        ('{"items": null}', "'items' should be a list"),
+        ('{"mottos": "abc"}', "'mottos' should be a list of strings"),
+        ('{"mottos": ["a"], "select_motto": 2}', "'select_motto' should be"),
+        ('{"select_motto": "1"}', "'select_motto' should be"),
+        ('{"hide_motto": 1}', "'hide_motto' should be"),
+        ('{"items": [{"ctime": 1}]}', "item 1: 'dtime' should be a number"),
+    ],
+)
+def test_bad_db(tmp_path, content, message):
+    path = tmp_path.joinpath("todo-db.json")
+    path.write_text(content)
+    for trusted in (False, True):
+        if trusted and "item 1" in message:
+            continue
+        with pytest.raises(click.ClickException) as e:
+            util.load_db_from(path, trusted)
+        assert message in e.value.message
+
+
+def test_good_db(tmp_path):
+    db = new_db()
+    db["items"].append(new_todoitem("abc"))
+    db["mottos"] = ["a", "b"]
+    db["select_motto"] = 2
+    path = write_json(tmp_path.joinpath("todo-db.json"), db)
+    assert util.load_db_from(path) == db
+
+
+def test_bad_history(tmp_path):
+    path = tmp_path.joinpath("todo-history.json")
+    entry = {"cmd": "done 1"}
+    write_json(path, {"db_path": "db", "undo": [entry], "redo": []})
+    with pytest.raises(ValueError, match="'delta' should be an object"):
+        history.load_history(path, "db")
+
+    entry["delta"] = history.new_delta()
+    write_json(path, {"db_path": "db", "undo": [entry], "redo": None})
+    with pytest.raises(ValueError, match="'redo' should be a list"):
+        history.load_history(path, "db")
+
+
+def test_history_of_another_db(tmp_path):
+    path = write_json(tmp_path.joinpath("todo-history.json"), {"db_path": "old"})
+    assert history.load_history(path, "db") == history.new_history("db")
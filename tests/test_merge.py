@@ -0,0 +1,121 @@
+"""合并数据库的多个版本 (simpletodo.merge)"""
+
+import json
+from pathlib import Path
+
+from simpletodo import util
+from simpletodo.merge import merge_dbs, merge_items
+from simpletodo.model import DB, TodoItem
+
+
+def make_item(ctime: float, event: str = "", **kwargs) -> TodoItem:
+    item = TodoItem(
+        ctime=ctime,
+        dtime=0,
+        event=event or f"item {ctime}",
+        status="Incomplete",
+        repeat="Never",
+        s_date="",
+        n_date="",
+        mtime=ctime,
+    )
+    item.update(kwargs)
+    return item
+
+
+def make_db(items: list[TodoItem]) -> DB:
+    return DB(u_date="", items=items, hide_motto=False, select_motto=0, mottos=[])
+
+
+def events(items: list[TodoItem]) -> list[str]:
+    return [x["event"] for x in items]
+
+
+def test_two_way_union():
+    """没有 base 时取并集，对方新增的事项放在最前面。"""
+    a, b, c = make_item(1), make_item(2), make_item(3)
+    merged = merge_items([b, a], [c, a], None)
+    assert events(merged) == ["item 3", "item 2", "item 1"]
+
+
+def test_two_way_cannot_delete():
+    """没有 base 时无法判断删除，我方删除的事项会被对方带回来。"""
+    a, b = make_item(1), make_item(2)
+    merged = merge_items([a], [b, a], None)
+    assert events(merged) == ["item 2", "item 1"]
+
+
+def test_three_way_delete():
+    """一方删除、另一方没有修改，则删除。"""
+    a, b = make_item(1), make_item(2)
+    base = [b, a]
+    assert events(merge_items([a], [b, a], base)) == ["item 1"]
+    assert events(merge_items([b, a], [a], base)) == ["item 1"]
+
+
+def test_three_way_modify_beats_delete():
+    """一方删除、另一方修改，则保留修改后的事项。"""
+    a, b = make_item(1), make_item(2)
+    base = [b, a]
+    edited = make_item(2, "edited", mtime=10)
+
+    # 我方删除，对方修改
+    assert events(merge_items([a], [edited, a], base)) == ["edited", "item 1"]
+    # 我方修改，对方删除
+    assert events(merge_items([edited, a], [a], base)) == ["edited", "item 1"]
+
+
+def test_per_field_merge():
+    """双方修改了不同的字段，两处修改都保留。"""
+    base = make_item(1, "old")
+    ours = make_item(1, "new", mtime=10)
+    theirs = make_item(1, "old", status="Completed", dtime=20, mtime=20)
+    [item] = merge_items([ours], [theirs], [base])
+    assert item["event"] == "new"
+    assert item["status"] == "Completed"
+    assert item["dtime"] == 20
+    assert item["mtime"] == 20
+
+
+def test_last_writer_wins():
+    """双方修改了同一字段，以 mtime 较新的一方为准。"""
+    base = make_item(1, "old")
+    ours = make_item(1, "ours", mtime=30)
+    theirs = make_item(1, "theirs", mtime=20)
+    assert merge_items([ours], [theirs], [base])[0]["event"] == "ours"
+    assert merge_items([theirs], [ours], [base])[0]["event"] == "ours"
+    assert merge_items([ours], [theirs], None)[0]["event"] == "ours"
+
+
+def test_items_without_mtime(tmp_path: Path):
+    """旧版本的事项没有 mtime, 读取时以 ctime 与 dtime 中较大者补上，
+    因此对方后来完成的事项应以对方为准。"""
+    ours = make_item(100)
+    theirs = make_item(100, status="Completed", dtime=500)
+    del ours["mtime"], theirs["mtime"]
+    paths = []
+    for name, item in (("ours", ours), ("theirs", theirs)):
+        path = tmp_path.joinpath(f"{name}.json")
+        path.write_text(json.dumps(make_db([item])))
+        paths.append(path)
+
+    for trusted in (False, True):
+        ours_db, theirs_db = (util.load_db_from(p, trusted) for p in paths)
+        [item] = merge_dbs(ours_db, theirs_db)["items"]
+        assert item["status"] == "Completed"
+        assert item["dtime"] == 500
+        assert item["mtime"] == 500
+
+
+def test_merge_dbs_fields():
+    ours = make_db([])
+    theirs = make_db([])
+    base = make_db([])
+    theirs["mottos"] = ["a"]
+    theirs["select_motto"] = 1
+    ours["u_date"] = "2026-10-19"
+    theirs["u_date"] = "2026-10-18"
+    db = merge_dbs(ours, theirs, base)
+    assert db["mottos"] == ["a"]
+    assert db["select_motto"] == 1
+    assert db["u_date"] == "2026-10-18"
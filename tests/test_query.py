@@ -0,0 +1,83 @@
+"""'todo ls' 的查询条件 (simpletodo.query)"""
+
+import arrow
+import pytest
+
+from simpletodo.model import TodoItem
+from simpletodo.query import compile_query
+
+
+def make_item(event: str, n_date: str = "", **kwargs) -> TodoItem:
+    item = TodoItem(
+        ctime=1600000000.0,
+        dtime=0,
+        event=event,
+        status="Incomplete",
+        repeat="Never",
+        s_date="",
+        n_date=n_date,
+        mtime=1600000000.0,
+    )
+    item.update(kwargs)
+    return item
+
+
+def select(query: str, items: list[TodoItem]) -> list[str]:
+    pred, err = compile_query(query)
+    assert err == ""
+    return [x["event"] for x in items if pred(x)]
+
+
+def test_date_fields():
+    items = [
+        make_item("no date"),
+        make_item("early", "2026-01-15"),
+        make_item("late", "2026-12-01"),
+    ]
+    assert select("n_date<2026-06-01", items) == ["early"]
+    assert select("n_date>=2026/12/01", items) == ["late"]
+    assert select("n_date:2026-01-15", items) == ["early"]
+
+
+def test_date_today():
+    today = arrow.now()
+    items = [
+        make_item("past", today.shift(days=-1).format("YYYY-MM-DD")),
+        make_item("today", today.format("YYYY-MM-DD")),
+        make_item("future", today.shift(days=1).format("YYYY-MM-DD")),
+    ]
+    assert select("n_date<today", items) == ["past"]
+    assert select("n_date<=today", items) == ["past", "today"]
+    assert select("n_date>today", items) == ["future"]
+
+
+@pytest.mark.parametrize(
+    "query", ["n_date<foo", "s_date=2026-13-01", "ctime>yesterday"]
+)
+def test_invalid_date(query):
+    _, err = compile_query(query)
+    assert err.startswith("Invalid date:")
+
+
+def test_terms_are_combined():
+    items = [
+        make_item("weekly report", status="Waiting", repeat="Week"),
+        make_item("monthly report", repeat="Month"),
+        make_item("buy milk"),
+    ]
+    assert select("report status:incomplete", items) == ["monthly report"]
+    assert select("repeat:week", items) == ["weekly report"]
+    assert select("", items) == ["weekly report", "monthly report", "buy milk"]
+
+
+@pytest.mark.parametrize(
+    "query, message",
+    [
+        ("status:foo", "Unknown status"),
+        ("status<incomplete", "not supported"),
+        ('text:"unclosed', "Invalid query"),
+    ],
+)
+def test_invalid_query(query, message):
+    _, err = compile_query(query)
+    assert message in err
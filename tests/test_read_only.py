@@ -0,0 +1,177 @@
+"""只读模式 ('todo --read-only' 或 TODO_READ_ONLY=1) 不应写入任何文件
+
+在子进程中运行 todo, 并用 sys.addaudithook 记录所有写入文件的操作。
+配置文件与数据库放在临时的 XDG_CONFIG_HOME 中，其中包含已到期的周期计划
+以及尚未升级的配置 ("upgrade": ""), 正常模式下这两者都会导致写入。
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC_DIR = Path(__file__).resolve().parents[1].joinpath("src")
+
+RUNNER = """
+import os
+import sys
+
+WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_CREAT | os.O_TRUNC | os.O_APPEND
+WRITE_EVENTS = {
+    "os.chmod",
+    "os.link",
+    "os.mkdir",
+    "os.remove",
+    "os.rename",
+    "os.rmdir",
+    "os.symlink",
+    "os.truncate",
+    "os.utime",
+    "shutil.copyfile",
+    "shutil.move",
+    "shutil.rmtree",
+}
+
+
+def hook(event, args):
+    if event == "open":
+        flags = args[2] if len(args) > 2 else 0
+        if isinstance(flags, int) and flags & WRITE_FLAGS:
+            sys.__stderr__.write(f"WRITE: open {args[0]!r}\\n")
+    elif event in WRITE_EVENTS:
+        sys.__stderr__.write(f"WRITE: {event} {args!r}\\n")
+
+
+sys.addaudithook(hook)
+
+from simpletodo.cache import main
+
+sys.argv[0] = "todo"
+main()
+"""
+
+
+def make_item(event: str, **kwargs) -> dict:
+    item = dict(
+        ctime=1600000000.0,
+        dtime=0,
+        event=event,
+        status="Incomplete",
+        repeat="Never",
+        s_date="",
+        n_date="",
+        mtime=1600000000.0,
+    )
+    item.update(kwargs)
+    return item
+
+
+@pytest.fixture
+def home(tmp_path: Path) -> Path:
+    """临时的 XDG 目录，包含一个需要升级、需要刷新周期计划的数据库。"""
+    config_dir = tmp_path.joinpath("config", "todo")
+    config_dir.mkdir(parents=True)
+    db_path = config_dir.joinpath("todo-db.json")
+    db = dict(
+        u_date="",
+        items=[
+            make_item("a todo item", ctime=1600000003.0),
+            # 已到期的周期计划，正常模式下会被刷新为 Incomplete
+            make_item(
+                "a due schedule",
+                ctime=1600000002.0,
+                status="Waiting",
+                repeat="Month",
+                s_date="2020-01-01",
+                n_date="2020-02-01",
+            ),
+            # 旧版本的周期计划 (Completed 且 dtime 为 0), 升级时会被修改
+            make_item(
+                "an old schedule",
+                ctime=1600000001.0,
+                status="Completed",
+                repeat="Week",
+                s_date="2020-01-01",
+                n_date="2020-01-08",
+            ),
+        ],
+        hide_motto=True,
+        select_motto=0,
+        mottos=[],
+    )
+    db_path.write_text(json.dumps(db))
+    cfg = dict(db_path=str(db_path), upgrade="")
+    config_dir.joinpath("todo-config.json").write_text(json.dumps(cfg))
+    return tmp_path
+
+
+def run_todo(home: Path, args: list[str], read_only_env: str | None = None):
+    env = dict(os.environ)
+    env.pop("TODO_READ_ONLY", None)
+    if read_only_env is not None:
+        env["TODO_READ_ONLY"] = read_only_env
+    env["XDG_CONFIG_HOME"] = str(home.joinpath("config"))
+    env["XDG_CACHE_HOME"] = str(home.joinpath("cache"))
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    env["PYTHONPATH"] = os.pathsep.join(
+        x for x in (str(SRC_DIR), env.get("PYTHONPATH")) if x
+    )
+    return subprocess.run(
+        [sys.executable, "-c", RUNNER, *args],
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+
+
+def writes(result) -> list[str]:
+    return [x for x in result.stderr.splitlines() if x.startswith("WRITE:")]
+
+
+def snapshot(home: Path) -> dict[str, bytes]:
+    return {str(p): p.read_bytes() for p in sorted(home.rglob("*")) if p.is_file()}
+
+
+def test_normal_mode_writes(home):
+    """对照组：确认审计钩子能发现写入 (升级配置、刷新周期计划、写入缓存)。"""
+    result = run_todo(home, [])
+    assert result.returncode == 0, result.stderr
+    assert writes(result)
+
+
+@pytest.mark.parametrize(
+    "args, env",
+    [
+        (["--read-only"], None),
+        (["--read-only", "-a"], None),
+        ([], "1"),
+        (["-a"], "true"),
+    ],
+)
+def test_read_only_never_writes(home, args, env):
+    before = snapshot(home)
+    for _ in range(2):
+        result = run_todo(home, args, env)
+        assert result.returncode == 0, result.stderr
+        assert writes(result) == []
+        assert "a due schedule" in result.stdout
+    assert snapshot(home) == before
+
+
+@pytest.mark.parametrize("env", ["", "0", "false", "no"])
+def test_read_only_env_off(home, env):
+    result = run_todo(home, [], env)
+    assert result.returncode == 0, result.stderr
+    assert writes(result)
+
+
+def test_read_only_without_config(tmp_path):
+    result = run_todo(tmp_path, ["--read-only"])
+    assert result.returncode != 0
+    assert "read-only" in result.stderr
+    assert writes(result) == []
+    assert list(tmp_path.iterdir()) == []